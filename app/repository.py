@@ -3,6 +3,7 @@ from typing import Any
 from sqlalchemy.sql.expression import ColumnExpressionArgument
 
 from app.model import Person
+from gfmodules_python_shared.repository.async_base import AsyncRepositoryBase
 from gfmodules_python_shared.repository.base import RepositoryBase
 
 
@@ -10,3 +11,9 @@ class PersonRepository(RepositoryBase[Person]):
     @property
     def order_by(self) -> tuple[ColumnExpressionArgument[Any] | str, ...]:
         return (self.model.created_at,)
+
+
+class AsyncPersonRepository(AsyncRepositoryBase[Person]):
+    @property
+    def order_by(self) -> tuple[ColumnExpressionArgument[Any] | str, ...]:
+        return (self.model.created_at,)
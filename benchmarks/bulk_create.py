@@ -0,0 +1,69 @@
+"""
+Compares the throughput of inserting rows one entity at a time with
+RepositoryBase.create against the executemany based create_many and upsert_many.
+
+usage: python -m benchmarks.bulk_create [--rows N]
+"""
+
+import argparse
+from time import perf_counter
+from typing import Callable
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+from app.model import Person
+from app.repository import PersonRepository
+from gfmodules_python_shared.schema.sql_model import SQLModelBase
+
+
+def per_entity(repository: PersonRepository, rows: int) -> None:
+    for i in range(rows):
+        repository.create(Person(name=f"person {i}", age=i % 100))
+
+
+def create_many(repository: PersonRepository, rows: int) -> None:
+    repository.create_many(Person(name=f"person {i}", age=i % 100) for i in range(rows))
+
+
+def create_many_dicts(repository: PersonRepository, rows: int) -> None:
+    repository.create_many({"name": f"person {i}", "age": i % 100} for i in range(rows))
+
+
+def upsert_many(repository: PersonRepository, rows: int) -> None:
+    repository.upsert_many(
+        ({"name": f"person {i}", "age": i % 100} for i in range(rows)),
+        index_elements=["name"],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite:///:memory:")
+    SQLModelBase.metadata.create_all(engine)
+    session_maker = sessionmaker(engine)
+
+    benchmarks: dict[str, Callable[[PersonRepository, int], None]] = {
+        "create per entity": per_entity,
+        "create_many entities": create_many,
+        "create_many dicts": create_many_dicts,
+        "upsert_many dicts": upsert_many,
+    }
+    for name, insert in benchmarks.items():
+        with session_maker.begin() as session:
+            session.execute(delete(Person))
+
+        with session_maker.begin() as session:
+            start = perf_counter()
+            insert(PersonRepository(session), args.rows)
+            session.flush()
+            elapsed = perf_counter() - start
+
+        print(f"{name:<22} {args.rows / elapsed:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Measures the per call overhead of the session_manager decorator compared to using
+a bare sessionmaker context with a transaction.
+
+usage: python -m benchmarks.session_manager_overhead [--calls N]
+"""
+
+import argparse
+from timeit import repeat
+
+import inject
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.repository import PersonRepository
+from gfmodules_python_shared.schema.sql_model import SQLModelBase
+from gfmodules_python_shared.session.session_manager import (
+    get_repository,
+    session_manager,
+)
+
+
+def service(person_repository: PersonRepository = get_repository()) -> bool:
+    return person_repository is not None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite:///:memory:")
+    SQLModelBase.metadata.create_all(engine)
+    session_maker = sessionmaker(engine)
+
+    def bind(binder: inject.Binder) -> None:
+        binder.bind(sessionmaker[Session], session_maker)
+
+    inject.configure(bind, clear=True)
+
+    def bare() -> bool:
+        with session_maker() as session, session.begin():
+            return service(PersonRepository(session))
+
+    decorated = session_manager(service)
+
+    for name, func in (("bare sessionmaker", bare), ("session_manager", decorated)):
+        best = min(repeat(func, number=args.calls, repeat=args.repeat))
+        print(f"{name:<20} {best / args.calls * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Benchmarks the repository queries, serialization and the session_manager decorator
+on SQLite databases of the given sizes, and writes the timings as JSON.
+
+usage: python -m benchmarks.suite [--sizes N ...] [--output FILE] [--filter TEXT]
+       python -m benchmarks.suite compare BASELINE CURRENT [--threshold RATIO]
+
+The compare mode lists the benchmarks of both runs side by side, and exits with
+status 1 when one is slower than the baseline by more than the threshold.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from collections.abc import Callable, Iterator
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from functools import partial
+from random import Random
+from statistics import median
+from timeit import Timer
+from typing import Any
+
+import inject
+import sqlalchemy
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.model import Person
+from app.repository import PersonRepository
+from gfmodules_python_shared.schema.sql_model import SQLModelBase
+from gfmodules_python_shared.session.session_manager import (
+    get_repository,
+    session_manager,
+)
+
+SIZES = (1_000, 10_000, 100_000)
+PAGE = 100
+LOOKUP_SIZES = (10, 1_000, 10_000)
+
+Benchmark = Callable[[], object]
+
+
+@dataclass(frozen=True)
+class Result:
+    name: str
+    size: int
+    # seconds per call, the best and the median of the repeats
+    best: float
+    median: float
+    calls: int
+
+
+def dataset(size: int) -> sessionmaker[Session]:
+    engine = create_engine("sqlite://")
+    SQLModelBase.metadata.create_all(engine)
+    session_maker = sessionmaker(engine, expire_on_commit=False)
+    with session_maker.begin() as session:
+        PersonRepository(session).create_many(
+            {
+                "name": f"person {i}",
+                "age": i % 100,
+                "created_at": datetime.fromordinal(730_000 + i % 20_000),
+            }
+            for i in range(size)
+        )
+    return session_maker
+
+
+def repository_benchmarks(
+    session: Session, size: int
+) -> Iterator[tuple[str, Benchmark]]:
+    repository = PersonRepository(session)
+    names = [f"person {i}" for i in Random(size).sample(range(size), min(size, 1_000))]
+    ids = [person.id for person in repository.get_by_property("name", names[:100])]
+    turn = iter(range(sys.maxsize))
+
+    yield "get by primary key", lambda: repository.get(id=ids[next(turn) % len(ids)])
+    yield "get by name", lambda: repository.get(name=names[next(turn) % len(names)])
+    for offset in sorted({0, size // 2, max(size - PAGE, 0)}):
+        yield (
+            f"get_many offset {offset}",
+            partial(repository.get_many, limit=PAGE, offset=offset),
+        )
+    middle = repository.get_many(limit=1, offset=size // 2)[0]
+    cursor = repository.cursor_of(middle)
+    yield (
+        "get_many cursor middle",
+        lambda: repository.get_many(limit=PAGE, cursor=cursor),
+    )
+    yield "count", repository.count
+    yield "count filtered", lambda: repository.count(age=42)
+    for values in (n for n in LOOKUP_SIZES if n <= size):
+        lookup = [f"person {i}" for i in range(values)]
+        yield (
+            f"get_by_property {values} values",
+            partial(repository.get_by_property, "name", lookup),
+        )
+
+    page = list(repository.get_many(limit=PAGE))
+    yield f"to_dict {PAGE} entities", lambda: [person.to_dict() for person in page]
+    yield f"to_dicts {PAGE} entities", lambda: Person.to_dicts(page)
+    yield f"__repr__ {PAGE} entities", lambda: [repr(person) for person in page]
+
+
+def service(person_repository: PersonRepository = get_repository()) -> int:
+    return len(person_repository.get_many(limit=1))
+
+
+def session_manager_benchmarks(
+    session_maker: sessionmaker[Session],
+) -> Iterator[tuple[str, Benchmark]]:
+    def bare() -> int:
+        with session_maker() as session, session.begin():
+            return service(PersonRepository(session))
+
+    yield "bare sessionmaker", bare
+    yield "session_manager", session_manager(service)
+    yield "session_manager no refresh", session_manager(refresh=False)(service)
+    yield "session_manager read only", session_manager(read_only=True)(service)
+
+
+def measure(name: str, size: int, func: Benchmark, repeat: int) -> Result:
+    timer = Timer(func)
+    calls, _ = timer.autorange()
+    timings = [total / calls for total in timer.repeat(repeat=repeat, number=calls)]
+    return Result(name, size, min(timings), median(timings), calls)
+
+
+def run(args: argparse.Namespace) -> None:
+    results: list[Result] = []
+    for size in args.sizes:
+        session_maker = dataset(size)
+
+        def bind(binder: inject.Binder, session_maker: Any = session_maker) -> None:
+            binder.bind(sessionmaker[Session], session_maker)
+
+        inject.configure(bind, clear=True)
+        with session_maker() as session:
+            benchmarks = [
+                *repository_benchmarks(session, size),
+                *session_manager_benchmarks(session_maker),
+            ]
+            for name, func in benchmarks:
+                if args.filter and args.filter not in name:
+                    continue
+                session.expunge_all()
+                result = measure(name, size, func, args.repeat)
+                results.append(result)
+                print(f"{size:>9} {name:<32} {result.best * 1e6:12.2f} us/call")
+
+    report = {"meta": metadata(), "results": [asdict(r) for r in results]}
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def metadata() -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "sqlalchemy": sqlalchemy.__version__,
+    }
+
+
+def compare(args: argparse.Namespace) -> int:
+    baseline, current = (
+        {(r["name"], r["size"]): r["best"] for r in load(path)["results"]}
+        for path in (args.baseline, args.current)
+    )
+    regressions = 0
+    for key in sorted(baseline.keys() & current.keys(), key=lambda k: (k[1], k[0])):
+        change = current[key] / baseline[key] - 1
+        regressed = change > args.threshold
+        regressions += regressed
+        print(
+            f"{key[1]:>9} {key[0]:<32} {baseline[key] * 1e6:12.2f} "
+            f"{current[key] * 1e6:12.2f} us/call {change:+8.1%}"
+            + (" REGRESSION" if regressed else "")
+        )
+    for key in sorted(baseline.keys() ^ current.keys()):
+        print(f"{key[1]:>9} {key[0]:<32} only in one of the runs")
+    return 1 if regressions else 0
+
+
+def load(path: str) -> dict[str, Any]:
+    with open(path) as file:
+        report: dict[str, Any] = json.load(file)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--filter", help="only run the benchmarks containing it")
+
+    compare_parser = subparsers.add_parser("compare")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        sys.exit(compare(args))
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
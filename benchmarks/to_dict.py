@@ -0,0 +1,50 @@
+"""
+Measures the serialization of a page of entities with the former column walk of
+to_dict, the attrgetter based to_dict, and the bulk to_dicts / to_columns.
+
+usage: python -m benchmarks.to_dict [--rows N]
+"""
+
+import argparse
+from datetime import datetime
+from timeit import repeat
+from typing import Any
+from uuid import uuid4
+
+from app.model import Person
+
+
+def column_walk(entity: Person) -> dict[str, Any]:
+    # to_dict as it was, walking the table columns on every call
+    return {
+        column: getattr(entity, column)
+        for column in (column.name for column in entity.__table__.columns)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    people = [
+        Person(id=uuid4(), name=f"person {i}", age=i, created_at=datetime.now())
+        for i in range(args.rows)
+    ]
+    assert [column_walk(p) for p in people] == Person.to_dicts(people)
+
+    candidates = (
+        ("column walk", lambda: [column_walk(p) for p in people]),
+        ("to_dict", lambda: [p.to_dict() for p in people]),
+        ("to_dicts", lambda: Person.to_dicts(people)),
+        ("to_columns", lambda: Person.to_columns(people)),
+    )
+    for name, func in candidates:
+        best = min(repeat(func, number=args.number, repeat=args.repeat))
+        print(f"{name:<12} {best / args.number * 1e3:8.3f} ms/{args.rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from time import perf_counter, time_ns
+from typing import Any, Protocol
+
+from sqlalchemy import Engine, event
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ServiceMetrics:
+    """
+    Measurements of a single call of a service, the durations are in seconds.
+    """
+
+    service: str
+    # wall clock start in nanoseconds since the epoch, as expected by span exporters
+    started_at: int = field(default_factory=time_ns)
+    duration: float = 0.0
+    statements: int = 0
+    statement_time: float = 0.0
+    rows: int = 0
+    retries: int = 0
+    backoff: float = 0.0
+    connect_wait: float = 0.0
+    error: str | None = None
+    # the SQL of the statements executed, only kept when requested
+    captured: list[str] | None = None
+
+
+class InstrumentationSink(Protocol):
+    def record(self, metrics: ServiceMetrics) -> None: ...
+
+
+class NoopSink:
+    """
+    Default sink, while it is set services are not measured at all.
+    """
+
+    def record(self, metrics: ServiceMetrics) -> None:
+        pass
+
+
+class LoggingSink:
+    """
+    Logs the metrics of every service call, or only of the calls taking longer than
+    slow_threshold seconds when given.
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger = logger,
+        level: int = logging.INFO,
+        slow_threshold: float | None = None,
+    ) -> None:
+        self.logger = logger
+        self.level = level
+        self.slow_threshold = slow_threshold
+
+    def record(self, metrics: ServiceMetrics) -> None:
+        if self.slow_threshold is not None and metrics.duration < self.slow_threshold:
+            return
+        self.logger.log(
+            self.level,
+            f"Service {metrics.service} took {metrics.duration * 1000:.1f}ms, "
+            f"{metrics.statements} statements ({metrics.statement_time * 1000:.1f}ms), "
+            f"{metrics.rows} rows, {metrics.retries} retries "
+            f"({metrics.backoff * 1000:.1f}ms backoff), "
+            f"{metrics.connect_wait * 1000:.1f}ms connection wait"
+            + (f", failed with {metrics.error}" if metrics.error else ""),
+        )
+
+
+class SpanSink:
+    """
+    Records a span per service call with the given tracer, which follows the
+    OpenTelemetry tracer API, eg: `SpanSink(trace.get_tracer(__name__))`.
+    """
+
+    def __init__(self, tracer: Any) -> None:
+        self.tracer = tracer
+
+    def record(self, metrics: ServiceMetrics) -> None:
+        attributes = {
+            f"db.{name}": value
+            for name, value in asdict(metrics).items()
+            if name not in ("service", "started_at", "duration", "error", "captured")
+        }
+        if metrics.error is not None:
+            attributes["error.type"] = metrics.error
+        span = self.tracer.start_span(
+            metrics.service, start_time=metrics.started_at, attributes=attributes
+        )
+        span.end(end_time=metrics.started_at + int(metrics.duration * 1e9))
+
+
+NOOP_SINK = NoopSink()
+
+_current: ContextVar[ServiceMetrics | None] = ContextVar(
+    "service_metrics", default=None
+)
+_instrumentation_sinks: dict[Any, InstrumentationSink] = {}
+
+
+def register_instrumentation_sink(
+    session_maker: Any, sink: InstrumentationSink
+) -> None:
+    """
+    Measures the services of the (async) sessionmaker into the given sink, eg:
+    `register_instrumentation_sink(session_maker, LoggingSink(slow_threshold=0.5))`
+    in the container setup.
+    """
+    _instrumentation_sinks[session_maker] = sink
+
+
+def get_instrumentation_sink(session_maker: Any) -> InstrumentationSink:
+    return _instrumentation_sinks.get(session_maker, NOOP_SINK)
+
+
+@contextmanager
+def instrumented(
+    service: str, sink: InstrumentationSink, capture: bool = False
+) -> Iterator[ServiceMetrics | None]:
+    """
+    Measures the service call within, the statements executed on instrumented engines
+    and the rows, retries and connection wait recorded meanwhile are accounted to it.
+    Yields None for a NoopSink, leaving the call unmeasured, unless the statements
+    are to be captured. The statements and rows of a nested service call are also
+    accounted to the calling service.
+    """
+    caller = _current.get()
+    capture = capture or (caller is not None and caller.captured is not None)
+    if isinstance(sink, NoopSink) and not capture:
+        yield None
+        return
+
+    metrics = ServiceMetrics(service, captured=[] if capture else None)
+    token = _current.set(metrics)
+    started = perf_counter()
+    try:
+        yield metrics
+    except BaseException as e:
+        metrics.error = e.__class__.__name__
+        raise
+    finally:
+        metrics.duration = perf_counter() - started
+        _current.reset(token)
+        if caller is not None:
+            caller.statements += metrics.statements
+            caller.statement_time += metrics.statement_time
+            caller.rows += metrics.rows
+            if caller.captured is not None:
+                caller.captured.extend(metrics.captured or [])
+        try:
+            sink.record(metrics)
+        except Exception as e:
+            logger.warning(f"Instrumentation sink failed due to {e}")
+
+
+def instrument_engine(bind: Any) -> None:
+    """
+    Counts and times the statements executed on the (async) engine.
+    """
+    engine = getattr(bind, "sync_engine", bind)
+    if isinstance(engine, Engine) and not event.contains(
+        engine, "before_cursor_execute", _before_cursor_execute
+    ):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def current_metrics() -> ServiceMetrics | None:
+    return _current.get()
+
+
+def record_rows(rows: int) -> None:
+    if (metrics := _current.get()) is not None:
+        metrics.rows += rows
+
+
+def record_retry(backoff: float) -> None:
+    if (metrics := _current.get()) is not None:
+        metrics.retries += 1
+        metrics.backoff += backoff
+
+
+def record_connect_wait(wait: float) -> None:
+    if (metrics := _current.get()) is not None:
+        metrics.connect_wait += wait
+
+
+def _before_cursor_execute(
+    connection: Any, cursor: Any, statement: str, *_: Any
+) -> None:
+    if (metrics := _current.get()) is not None:
+        metrics.statements += 1
+        if metrics.captured is not None:
+            metrics.captured.append(statement)
+        connection.info["instrumented_at"] = perf_counter()
+
+
+def _after_cursor_execute(connection: Any, *_: Any) -> None:
+    started = connection.info.pop("instrumented_at", None)
+    if (metrics := _current.get()) is not None and started is not None:
+        metrics.statement_time += perf_counter() - started
@@ -0,0 +1,247 @@
+from abc import abstractmethod
+from typing import Any, Iterable, List, Mapping, Sequence, TypeVar, cast
+
+from sqlalchemy import Row, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.expression import ColumnExpressionArgument
+
+from gfmodules_python_shared.instrumentation import record_rows
+from gfmodules_python_shared.repository.exceptions import EntryNotFound
+from gfmodules_python_shared.schema.sql_model import TSQLModel
+
+from .cache import EntityKey, invalidate_caches, is_cacheable, is_read_only
+from .query_builder import GetKwargs, LoadOptions, QueryBuilder
+
+T = TypeVar("T")
+
+
+class AsyncGenericRepository(QueryBuilder[TSQLModel]):
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    @abstractmethod
+    def create(self, entity: TSQLModel) -> None: ...
+
+    @abstractmethod
+    async def delete(self, entity: TSQLModel) -> None: ...
+
+    @abstractmethod
+    async def get(
+        self, *, load: LoadOptions | None = None, **kwargs: GetKwargs
+    ) -> TSQLModel | None: ...
+
+    async def _scalars_all(
+        self,
+        statement: Select[tuple[T]],
+        params: Mapping[str, Any] | None = None,
+        unique: bool = False,
+    ) -> Sequence[T]:
+        result = await self.session.scalars(statement, params)
+        entities = (result.unique() if unique else result).all()
+        record_rows(len(entities))
+        return entities
+
+
+class AsyncRepositoryBase(AsyncGenericRepository[TSQLModel]):
+    """
+    Asyncio counterpart of RepositoryBase, every query is awaited on an AsyncSession.
+    Relationships can not be lazy loaded on an AsyncSession, the load option of the
+    queries loads them eagerly instead.
+    An entity_cache and query_cache are used and invalidated like those of
+    RepositoryBase.
+    """
+
+    def create(self, entity: TSQLModel) -> None:
+        self.session.add(entity)
+        self._invalidate_caches(self._primary_key_of(entity))
+
+    async def delete(self, entity: TSQLModel) -> None:
+        await self.session.delete(entity)
+        self._invalidate_caches(self._primary_key_of(entity))
+
+    async def get(
+        self, *, load: LoadOptions | None = None, **kwargs: GetKwargs
+    ) -> TSQLModel | None:
+        stmt = self._with_loaders(self._get_statement(**kwargs), load)
+        params = self._params(kwargs)
+        if (
+            (key := self._entity_cache_key(kwargs)) is None
+            or not self._cacheable()
+            or self._load_options(load)
+        ):
+            result = await self.session.scalars(stmt, params)
+            found = (result.unique() if self._joins(load) else result).first()
+            record_rows(found is not None)
+            return found
+
+        assert self.entity_cache is not None
+        if (cached := self.entity_cache.get(key)) is not None:
+            return await self._from_cache(cast(TSQLModel, cached))
+        entity = (await self.session.scalars(stmt, params)).first()
+        record_rows(entity is not None)
+        if entity is not None and self._cacheable():
+            self.entity_cache.put(entity)
+        return entity
+
+    async def get_or_fail(
+        self, *, load: LoadOptions | None = None, **kwargs: GetKwargs
+    ) -> TSQLModel:
+        if result := await self.get(load=load, **kwargs):
+            return result
+
+        raise EntryNotFound(self.model)
+
+    async def get_many(
+        self,
+        *,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        order_by: Iterable[ColumnExpressionArgument[Any] | str] | None = None,
+        load: LoadOptions | None = None,
+        **kwargs: GetKwargs,
+    ) -> Sequence[TSQLModel]:
+        stmt = self._with_loaders(
+            self._get_many_statement(
+                limit=limit, offset=offset, cursor=cursor, order_by=order_by, **kwargs
+            ),
+            load,
+        )
+        params = self._params(kwargs, limit, offset)
+        if (
+            self.query_cache is None
+            or not self._cacheable()
+            or self._load_options(load)
+        ):
+            return await self._scalars_all(stmt, params, self._joins(load))
+
+        key = self.query_cache.key(stmt, params)
+        if (cached := self.query_cache.get_entities(key)) is not None:
+            return [await self._from_cache(entity) for entity in cached]
+        entities = await self._scalars_all(stmt, params)
+        if self._cacheable():
+            self.query_cache.put_entities(key, entities)
+        return entities
+
+    async def get_many_columns(
+        self,
+        columns: Sequence[str],
+        *,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        order_by: Iterable[ColumnExpressionArgument[Any] | str] | None = None,
+        **kwargs: GetKwargs,
+    ) -> Sequence[Row[Any]]:
+        result = await self.session.execute(
+            self._projection_statement(
+                columns,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                order_by=order_by,
+                **kwargs,
+            ),
+            self._params(kwargs, limit, offset),
+        )
+        rows = result.all()
+        record_rows(len(rows))
+        return rows
+
+    async def count(self, **kwargs: GetKwargs) -> int:
+        stmt, params = self._count_statement(**kwargs), self._params(kwargs)
+        if self.query_cache is None or not self._cacheable():
+            return (await self.session.execute(stmt, params)).scalar() or 0
+
+        key = self.query_cache.key(stmt, params)
+        if (cached := self.query_cache.get_scalar(key)) is not None:
+            return cast(int, cached)
+        total = (await self.session.execute(stmt, params)).scalar() or 0
+        if self._cacheable():
+            self.query_cache.put_scalar(key, total)
+        return total
+
+    async def get_by_property(
+        self, attribute: str, values: List[Any], load: LoadOptions | None = None
+    ) -> Sequence[TSQLModel]:
+        return await self._lookup_by_property(
+            self._with_loaders(self._get_statement(), load),
+            self._property_column(attribute),
+            values,
+            self._joins(load),
+        )
+
+    async def get_missing_by_property(
+        self, attribute: str, values: List[Any]
+    ) -> set[Any]:
+        column = self._property_column(attribute)
+        return set(values).difference(
+            await self._lookup_by_property(select(column).distinct(), column, values)
+        )
+
+    async def get_by_property_exact(
+        self, attribute: str, values: List[Any], load: LoadOptions | None = None
+    ) -> Sequence[TSQLModel]:
+        entities = await self.get_by_property(attribute, values, load)
+
+        if missing := set(values).difference(
+            getattr(entity, attribute) for entity in entities
+        ):
+            raise EntryNotFound(self.model, missing)
+
+        return entities
+
+    def _cacheable(self) -> bool:
+        return is_cacheable(self.session.sync_session, self.model)
+
+    async def _from_cache(self, cached: TSQLModel) -> TSQLModel:
+        """
+        Returns the cached snapshot as is to read only services, otherwise merged
+        into the session without loading, see `RepositoryBase._from_cache`.
+        """
+        if is_read_only(self.session.sync_session):
+            return cached
+        return await self.session.merge(cached, load=False)
+
+    def _invalidate_caches(self, key: EntityKey | None = None) -> None:
+        if self.entity_cache is not None or self.query_cache is not None:
+            invalidate_caches(self.session.sync_session, self.model, key)
+
+    def _primary_key_of(self, entity: TSQLModel) -> EntityKey:
+        return tuple(getattr(entity, key) for key in self.model_metadata.primary_key)
+
+    async def _lookup_by_property(
+        self,
+        stmt: Select[tuple[T]],
+        column: InstrumentedAttribute[Any],
+        values: List[Any],
+        unique: bool = False,
+    ) -> List[T]:
+        values, null = self._lookup_values(values)
+        rows = (
+            [*await self._scalars_all(stmt.where(column.is_(None)), unique=unique)]
+            if null
+            else []
+        )
+        if not self._use_lookup_table(values):
+            return [
+                *rows,
+                *[
+                    row
+                    for chunk_stmt in self._lookup_statements(stmt, column, values)
+                    for row in await self._scalars_all(chunk_stmt, unique=unique)
+                ],
+            ]
+
+        lookup = self._lookup_table(column)
+        connection = await self.session.connection()
+        await connection.run_sync(lookup.create)
+        await connection.execute(
+            lookup.insert(), [{"value": value} for value in values]
+        )
+        joined = await self._scalars_all(
+            stmt.join(lookup, column == lookup.c.value), unique=unique
+        )
+        await connection.run_sync(lookup.drop)
+        return [*rows, *joined]
@@ -1,31 +1,55 @@
-from abc import ABCMeta, abstractmethod
-from typing import Any, Dict, Generic, Iterable, List, Sequence, Type, TypeAlias, Union
-from uuid import UUID
-
-from more_itertools import unique_to_each
-from sqlalchemy import Select, func, or_, select
-from sqlalchemy.exc import InvalidRequestError
-from sqlalchemy.orm import Session
+from abc import abstractmethod
+from typing import (
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    Sequence,
+    TypeAlias,
+    TypeVar,
+    cast,
+)
+
+from sqlalchemy import (
+    Delete,
+    Insert,
+    Result,
+    Row,
+    Select,
+    Update,
+    delete,
+    func,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import InstrumentedAttribute, Session, load_only
+from sqlalchemy.orm.attributes import instance_state
+from sqlalchemy.sql.dml import ReturningInsert
 from sqlalchemy.sql.expression import ColumnExpressionArgument
 
+from gfmodules_python_shared.instrumentation import record_rows
 from gfmodules_python_shared.repository.exceptions import EntryNotFound
+from gfmodules_python_shared.schema.pagination.page_schema import Page
+from gfmodules_python_shared.schema.pagination.pagination_query_params_schema import (
+    PaginationQueryParams,
+)
 from gfmodules_python_shared.schema.sql_model import TSQLModel
 
-from .sql_model_descriptor import ModelDescriptor
-
-GetKwargs: TypeAlias = Union[str, UUID, Dict[str, str]]
+from .cache import EntityKey, invalidate_caches, is_cacheable, is_read_only
+from .query_builder import GetKwargs, LoadOptions, QueryBuilder
 
+T = TypeVar("T")
+SynchronizeSession: TypeAlias = Literal["auto", "evaluate", "fetch", False]
 
-class GenericRepository(Generic[TSQLModel], metaclass=ABCMeta):
-    model: Type[TSQLModel] = ModelDescriptor()  # type: ignore # lazy load model type at runtime
 
+class GenericRepository(QueryBuilder[TSQLModel]):
     def __init__(self, session: Session) -> None:
         self.session = session
 
-    @property
-    @abstractmethod
-    def order_by(self) -> tuple[ColumnExpressionArgument[Any] | str, ...]: ...
-
     @abstractmethod
     def create(self, entity: TSQLModel) -> None: ...
 
@@ -33,87 +57,531 @@ class GenericRepository(Generic[TSQLModel], metaclass=ABCMeta):
     def delete(self, entity: TSQLModel) -> None: ...
 
     @abstractmethod
-    def get(self, **kwargs: GetKwargs) -> TSQLModel | None: ...
+    def get(
+        self, *, load: LoadOptions | None = None, **kwargs: GetKwargs
+    ) -> TSQLModel | None: ...
 
-    def _scalars_all(self, statement: Select[tuple[TSQLModel]]) -> Sequence[TSQLModel]:
-        return self.session.scalars(statement).all()
+    def _scalars_all(
+        self,
+        statement: Select[tuple[T]],
+        params: Mapping[str, Any] | None = None,
+        unique: bool = False,
+    ) -> Sequence[T]:
+        result = self.session.scalars(statement, params)
+        entities = (result.unique() if unique else result).all()
+        record_rows(len(entities))
+        return entities
 
 
 class RepositoryBase(GenericRepository[TSQLModel]):
     def create(self, entity: TSQLModel) -> None:
         self.session.add(entity)
+        self._invalidate_caches(self._primary_key_of(entity))
 
     def delete(self, entity: TSQLModel) -> None:
         self.session.delete(entity)
+        self._invalidate_caches(self._primary_key_of(entity))
 
-    def get(self, **kwargs: GetKwargs) -> TSQLModel | None:
-        self._validate_kwargs(**kwargs)
-        stmt = select(self.model).filter_by(**kwargs)
-        return self.session.scalars(stmt).first()
+    def create_many(
+        self,
+        entities: Iterable[TSQLModel | Mapping[str, Any]],
+        *,
+        return_keys: bool = False,
+    ) -> Sequence[Any]:
+        """
+        Inserts entities, or dicts of column values, with a single executemany
+        (insertmanyvalues) statement instead of a unit of work per entity. The given
+        entities are not added to the session.
+
+        When return_keys is set the primary keys of the inserted rows are returned in
+        the order of the given entities.
+        """
+        if not (rows := self._rows_of(entities)):
+            return []
+
+        stmt = insert(self.model)
+        self._invalidate_caches()
+        if not return_keys:
+            self.session.execute(stmt, rows)
+            return []
+        return self._keys_of(self.session.execute(self._returning_keys(stmt), rows))
+
+    def upsert_many(
+        self,
+        entities: Iterable[TSQLModel | Mapping[str, Any]],
+        *,
+        index_elements: Sequence[str] | None = None,
+        update: Sequence[str] | None = None,
+        return_keys: bool = False,
+    ) -> Sequence[Any]:
+        """
+        Inserts entities, or dicts of column values, and updates the rows that
+        conflict on the index elements (primary key by default):
+        eg: INSERT INTO users ... ON CONFLICT (id) DO UPDATE SET name = excluded.name
+
+        The columns to update default to the columns given for every row, an empty
+        update results in ON CONFLICT DO NOTHING. Supported for PostgreSQL and SQLite.
+        """
+        if not (rows := self._rows_of(entities)):
+            return []
+
+        index_elements = index_elements or self.model_metadata.primary_key
+        if update is None:
+            update = [
+                key
+                for key in set.intersection(*(set(row) for row in rows))
+                if key not in index_elements
+            ]
+        self._validate_columns([*index_elements, *update])
+
+        stmt: postgresql.Insert | sqlite.Insert
+        match dialect := self.session.get_bind().dialect.name:
+            case "postgresql":
+                stmt = postgresql.insert(self.model)
+            case "sqlite":
+                stmt = sqlite.insert(self.model)
+            case _:
+                raise NotImplementedError(f"Upsert is not supported for {dialect}")
+
+        stmt = (
+            stmt.on_conflict_do_update(
+                index_elements=index_elements,
+                set_={key: stmt.excluded[key] for key in update},
+            )
+            if update
+            else stmt.on_conflict_do_nothing(index_elements=index_elements)
+        )
+        self._invalidate_caches()
+        if not return_keys:
+            self.session.execute(stmt, rows)
+            return []
+        return self._keys_of(self.session.execute(self._returning_keys(stmt), rows))
+
+    def update_where(
+        self,
+        values: Mapping[str, Any],
+        *,
+        synchronize_session: SynchronizeSession = "auto",
+        **kwargs: GetKwargs,
+    ) -> int:
+        """
+        Updates the entities matching the filters with a single UPDATE statement,
+        without loading them, and returns the number of affected rows:
+        eg: UPDATE users SET active = :active WHERE users.expired = :expired
+
+        Entities of the session matching the filters are synchronized according to
+        synchronize_session ("auto", "evaluate", "fetch" or False).
+        """
+        if not values:
+            raise ValueError("No values given to update")
+        self._validate_columns(values)
+        stmt = update(self.model).values(**values)
+        return self._execute_where(stmt, synchronize_session, **kwargs)
 
-    def get_or_fail(self, **kwargs: GetKwargs) -> TSQLModel:
-        if result := self.get(**kwargs):
+    def delete_where(
+        self,
+        *,
+        synchronize_session: SynchronizeSession = "auto",
+        **kwargs: GetKwargs,
+    ) -> int:
+        """
+        Deletes the entities matching the filters with a single DELETE statement,
+        without loading them, and returns the number of affected rows:
+        eg: DELETE FROM users WHERE users.expired = :expired
+
+        Entities of the session matching the filters are synchronized according to
+        synchronize_session ("auto", "evaluate", "fetch" or False).
+        """
+        return self._execute_where(delete(self.model), synchronize_session, **kwargs)
+
+    def get(
+        self, *, load: LoadOptions | None = None, **kwargs: GetKwargs
+    ) -> TSQLModel | None:
+        """
+        Returns the first entity matching the filters, when the repository has an
+        entity_cache, lookups by primary key are served from the cache: as detached
+        snapshots to read only services, otherwise merged into the session.
+
+        The relationships are loaded as given by load, merged over the load of the
+        repository, eg: load={"posts": "selectin"}, the caches are then bypassed.
+        """
+        stmt = self._with_loaders(self._get_statement(**kwargs), load)
+        params = self._params(kwargs)
+        if (
+            (key := self._entity_cache_key(kwargs)) is None
+            or not self._cacheable()
+            or self._load_options(load)
+        ):
+            result = self.session.scalars(stmt, params)
+            found = (result.unique() if self._joins(load) else result).first()
+            record_rows(found is not None)
+            return found
+
+        assert self.entity_cache is not None
+        if (cached := self.entity_cache.get(key)) is not None:
+            return self._from_cache(cast(TSQLModel, cached))
+        entity = self.session.scalars(stmt, params).first()
+        record_rows(entity is not None)
+        if entity is not None and self._cacheable():
+            self.entity_cache.put(entity)
+        return entity
+
+    def get_or_fail(
+        self, *, load: LoadOptions | None = None, **kwargs: GetKwargs
+    ) -> TSQLModel:
+        if result := self.get(load=load, **kwargs):
             return result
 
         raise EntryNotFound(self.model)
 
-    def get_many(
+    def get_many(  # noqa: PLR0913
         self,
         *,
         limit: int | None = None,
         offset: int | None = None,
+        cursor: str | None = None,
         order_by: Iterable[ColumnExpressionArgument[Any] | str] | None = None,
+        columns: Sequence[str] | None = None,
+        load: LoadOptions | None = None,
         **kwargs: GetKwargs,
     ) -> Sequence[TSQLModel]:
-        self._validate_kwargs(**kwargs)
+        """
+        Pages through the entities either by offset or by cursor (keyset pagination).
 
-        order_by = self.order_by if order_by is None else [*self.order_by, *order_by]
+        The order is always completed with the primary key so that every entity has
+        a unique position, a cursor obtained with `cursor_of` seeks directly to the
+        entities after that position instead of scanning all skipped rows.
 
-        return self._scalars_all(
-            select(self.model)
-            .limit(limit=limit)
-            .offset(offset=offset)
-            .order_by(*order_by)
-            .filter_by(**kwargs)
+        When columns are given only those (and the primary key) are loaded, the other
+        attributes are loaded on access. When the repository has a query_cache, the
+        results of entire entities are served from the cache like those of `get`,
+        unless relationships are loaded.
+        """
+        stmt = self._with_loaders(
+            self._get_many_statement(
+                limit=limit, offset=offset, cursor=cursor, order_by=order_by, **kwargs
+            ),
+            load,
         )
+        params = self._params(kwargs, limit, offset)
+        unique = self._joins(load)
+        if columns is not None:
+            return self._scalars_all(
+                stmt.options(load_only(*self._columns(columns))), params, unique
+            )
+        if (
+            self.query_cache is None
+            or not self._cacheable()
+            or self._load_options(load)
+        ):
+            return self._scalars_all(stmt, params, unique)
 
-    def count(self, **kwargs: GetKwargs) -> int:
-        self._validate_kwargs(**kwargs)
-        stmt = select(func.count()).select_from(self.model).filter_by(**kwargs)
-        return self.session.execute(stmt).scalar() or 0
+        key = self.query_cache.key(stmt, params)
+        if (cached := self.query_cache.get_entities(key)) is not None:
+            return [self._from_cache(entity) for entity in cached]
+        entities = self._scalars_all(stmt, params)
+        if self._cacheable():
+            self.query_cache.put_entities(key, entities)
+        return entities
 
-    def get_by_property(self, attribute: str, values: List[str]) -> Sequence[TSQLModel]:
+    def get_many_columns(
+        self,
+        columns: Sequence[str],
+        *,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        order_by: Iterable[ColumnExpressionArgument[Any] | str] | None = None,
+        **kwargs: GetKwargs,
+    ) -> Sequence[Row[Any]]:
         """
-        Generates a chained OR condition based on the provided attribute values:
-        eg: SELECT * FROM users WHERE users.email = :email_1 OR users.email = :email_2
+        Selects only the given columns of the entities of `get_many`, with the same
+        filters and order, as rows straight from the cursor without building entities:
+        eg: SELECT users.id, users.email FROM users ORDER BY users.id LIMIT :limit
+
+        Rows are named tuples, `row._asdict()` turns them into dicts.
         """
-        if attribute not in self.model.__table__.columns.keys():  # noqa: SIM118
-            raise AttributeError(
-                f"{attribute} is not a column in the {self.model.__name__}"
-            )
-        return self._scalars_all(
-            select(self.model).where(
-                or_(*map(getattr(self.model, attribute).__eq__, values))
+        rows = self.session.execute(
+            self._projection_statement(
+                columns,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                order_by=order_by,
+                **kwargs,
+            ),
+            self._params(kwargs, limit, offset),
+        ).all()
+        record_rows(len(rows))
+        return rows
+
+    # the return annotation is quoted, as pydantic can not parametrize Page with the
+    # unbound model type at runtime
+    def get_page(
+        self,
+        params: PaginationQueryParams,
+        *,
+        with_total: bool = True,
+        order_by: Iterable[ColumnExpressionArgument[Any] | str] | None = None,
+        load: LoadOptions | None = None,
+        **kwargs: GetKwargs,
+    ) -> "Page[TSQLModel]":
+        """
+        Fetches a page of `get_many` together with the total in a single round trip,
+        using a COUNT(*) OVER () window, or an uncorrelated count subquery when paging
+        by cursor as the seek condition would restrict the window.
+
+        One extra entity is fetched to tell whether a next page exists, when the exact
+        total is too costly with_total=False leaves it out, relying on has_next.
+        """
+        stmt = self._with_loaders(
+            self._get_many_statement(
+                limit=params.limit + 1,
+                offset=params.offset,
+                cursor=params.cursor,
+                order_by=order_by,
+                **kwargs,
+            ),
+            load,
+        )
+        bound = self._params(kwargs, params.limit + 1, params.offset)
+        unique = self._joins(load)
+        total: int | None = None
+        if not with_total:
+            items = list(self._scalars_all(stmt, bound, unique))
+        else:
+            result = self.session.execute(
+                stmt.add_columns(
+                    self._count_statement(**kwargs).scalar_subquery()
+                    if params.cursor
+                    else func.count().over()
+                ),
+                bound,
             )
+            rows = (result.unique() if unique else result).all()
+            record_rows(len(rows))
+            items = [entity for entity, _ in rows]
+            total = rows[0][1] if rows else self.count(**kwargs)
+
+        has_next = len(items) > params.limit
+        items = items[: params.limit]
+        return Page[Any](
+            items=items,
+            limit=params.limit,
+            offset=params.offset,
+            total=total,
+            next_cursor=self._cursor_after(items[-1], order_by) if has_next else None,
+            has_next=has_next,
+        )
+
+    def iter_batches(  # noqa: PLR0913
+        self,
+        *,
+        batch_size: int = 1_000,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        order_by: Iterable[ColumnExpressionArgument[Any] | str] | None = None,
+        load: LoadOptions | None = None,
+        **kwargs: GetKwargs,
+    ) -> Iterator[Sequence[TSQLModel]]:
+        """
+        Yields the entities of `get_many` in batches of batch_size, fetched with
+        yield_per from a server side cursor where the database supports it, so memory
+        stays flat regardless of the number of entities.
+
+        The batches are fetched while iterating, thus the session must stay open.
+        Relationships can not be joined eagerly while yielding per batch, selectin
+        loading fetches them per batch instead.
+        """
+        stmt = self._with_loaders(
+            self._get_many_statement(
+                limit=limit, offset=offset, cursor=cursor, order_by=order_by, **kwargs
+            ),
+            load,
+        ).execution_options(yield_per=batch_size)
+        yield from self.session.scalars(
+            stmt, self._params(kwargs, limit, offset)
+        ).partitions()
+
+    def stream(  # noqa: PLR0913
+        self,
+        *,
+        batch_size: int = 1_000,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        order_by: Iterable[ColumnExpressionArgument[Any] | str] | None = None,
+        load: LoadOptions | None = None,
+        **kwargs: GetKwargs,
+    ) -> Iterator[TSQLModel]:
+        """
+        Yields the entities of `get_many` one by one, see `iter_batches`.
+        """
+        for batch in self.iter_batches(
+            batch_size=batch_size,
+            limit=limit,
+            offset=offset,
+            cursor=cursor,
+            order_by=order_by,
+            load=load,
+            **kwargs,
+        ):
+            yield from batch
+
+    def count(self, **kwargs: GetKwargs) -> int:
+        stmt, params = self._count_statement(**kwargs), self._params(kwargs)
+        if self.query_cache is None or not self._cacheable():
+            return self.session.execute(stmt, params).scalar() or 0
+
+        key = self.query_cache.key(stmt, params)
+        if (cached := self.query_cache.get_scalar(key)) is not None:
+            return cast(int, cached)
+        total = self.session.execute(stmt, params).scalar() or 0
+        if not self._cacheable():
+            return total
+        return cast(int, self.query_cache.put_scalar(key, total))
+
+    def get_by_property(
+        self, attribute: str, values: List[Any], load: LoadOptions | None = None
+    ) -> Sequence[TSQLModel]:
+        """
+        Selects the entities matching any of the provided attribute values, the lookup
+        strategy depends on the number of unique values:
+        - up to `property_lookup_chunk_size` values, a single expanding IN:
+          eg: SELECT * FROM users WHERE users.email IN (:email_1, :email_2)
+        - up to `property_lookup_join_threshold` values, an IN per chunk of values
+        - beyond that, a join on a temporary table filled with the values
+
+        A None value matches the entities whose attribute is NULL, with a separate
+        IS NULL lookup. Every strategy results in the same entities, in no particular
+        order.
+        """
+        return self._lookup_by_property(
+            self._with_loaders(self._get_statement(), load),
+            self._property_column(attribute),
+            values,
+            self._joins(load),
+        )
+
+    def get_missing_by_property(self, attribute: str, values: List[Any]) -> set[Any]:
+        """
+        Returns the provided attribute values that do not match any entity, only the
+        attribute column is selected, so no entity is loaded.
+        eg: SELECT DISTINCT users.email FROM users WHERE users.email IN (:email_1)
+        """
+        column = self._property_column(attribute)
+        return set(values).difference(
+            self._lookup_by_property(select(column).distinct(), column, values)
         )
 
     def get_by_property_exact(
-        self, attribute: str, values: List[str]
+        self, attribute: str, values: List[Any], load: LoadOptions | None = None
     ) -> Sequence[TSQLModel]:
-        entities = self.get_by_property(attribute, values)
+        entities = self.get_by_property(attribute, values, load)
 
-        if any(
-            unique_to_each((getattr(entity, attribute) for entity in entities), values)
+        if missing := set(values).difference(
+            getattr(entity, attribute) for entity in entities
         ):
-            raise EntryNotFound(self.model)
+            raise EntryNotFound(self.model, missing)
 
         return entities
 
-    def _validate_kwargs(self, **kwargs: GetKwargs) -> None:
-        # check if kwargs are a subset of column names for a given model
-        if args := ", ".join(
-            map(str, set(kwargs) - set(self.model.__table__.columns.keys()))
-        ):
-            raise InvalidRequestError(
-                f"{args} is not a column in the {self.model.__name__}"
-            )
+    def _execute_where(
+        self,
+        stmt: Update | Delete,
+        synchronize_session: SynchronizeSession,
+        **kwargs: GetKwargs,
+    ) -> int:
+        if not kwargs:
+            raise ValueError("At least one filter is required")
+        self._validate_kwargs(**kwargs)
+        self._invalidate_caches()
+        return self.session.execute(
+            stmt.filter_by(**kwargs),
+            execution_options={"synchronize_session": synchronize_session},
+        ).rowcount
+
+    def _cacheable(self) -> bool:
+        return is_cacheable(self.session, self.model)
+
+    def _from_cache(self, cached: TSQLModel) -> TSQLModel:
+        """
+        Returns the cached snapshot as is to read only services, otherwise merged
+        into the session without loading, so that its changes persist.
+        """
+        if is_read_only(self.session):
+            return cached
+        return self.session.merge(cached, load=False)
+
+    def _invalidate_caches(self, key: EntityKey | None = None) -> None:
+        if self.entity_cache is not None or self.query_cache is not None:
+            invalidate_caches(self.session, self.model, key)
+
+    def _primary_key_of(self, entity: TSQLModel) -> EntityKey:
+        return tuple(getattr(entity, key) for key in self.model_metadata.primary_key)
+
+    def _rows_of(
+        self, entities: Iterable[TSQLModel | Mapping[str, Any]]
+    ) -> List[dict[str, Any]]:
+        # only the attributes set on an entity are taken, unset columns get defaults
+        rows = [
+            dict(entity)
+            if isinstance(entity, Mapping)
+            else {
+                key: value
+                for key, value in instance_state(entity).dict.items()
+                if key in self.model_metadata.columns
+            }
+            for entity in entities
+        ]
+        for row in rows:
+            self._validate_columns(row)
+        return rows
+
+    def _returning_keys(self, stmt: Insert) -> ReturningInsert[Any]:
+        return stmt.returning(
+            *(
+                self.model_metadata.attributes[key]
+                for key in self.model_metadata.primary_key
+            ),
+            sort_by_parameter_order=True,
+        )
+
+    def _keys_of(self, result: Result[Any]) -> Sequence[Any]:
+        if len(self.model_metadata.primary_key) == 1:
+            return result.scalars().all()
+        return [tuple(row) for row in result]
+
+    def _lookup_by_property(
+        self,
+        stmt: Select[tuple[T]],
+        column: InstrumentedAttribute[Any],
+        values: List[Any],
+        unique: bool = False,
+    ) -> List[T]:
+        values, null = self._lookup_values(values)
+        rows = (
+            [*self._scalars_all(stmt.where(column.is_(None)), unique=unique)]
+            if null
+            else []
+        )
+        if not self._use_lookup_table(values):
+            return [
+                *rows,
+                *(
+                    row
+                    for chunk_stmt in self._lookup_statements(stmt, column, values)
+                    for row in self._scalars_all(chunk_stmt, unique=unique)
+                ),
+            ]
+
+        lookup = self._lookup_table(column)
+        connection = self.session.connection()
+        lookup.create(connection)
+        connection.execute(lookup.insert(), [{"value": value} for value in values])
+        joined = self._scalars_all(
+            stmt.join(lookup, column == lookup.c.value), unique=unique
+        )
+        lookup.drop(connection)
+        return [*rows, *joined]
@@ -0,0 +1,295 @@
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable, Hashable
+from threading import Lock
+from time import monotonic
+from typing import Any, Generic, Mapping, Protocol, Sequence, Type, TypeVar
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import DeclarativeBase, Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql.expression import ClauseElement
+
+from gfmodules_python_shared.schema.model_metadata import get_model_metadata
+
+from .sql_model_descriptor import resolve_model
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+EntityKey = tuple[Any, ...]
+# (model, primary key), a None primary key stands for every entity of the model
+Invalidation = tuple[Type[DeclarativeBase], EntityKey | None]
+
+
+class ModelCache(Protocol):
+    model: Type[DeclarativeBase] | None
+
+    def invalidate(self, key: EntityKey | None = None) -> None: ...
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Thread safe mapping holding at most `maxsize` entries for `ttl` seconds, the least
+    recently used entry is evicted first.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1_024,
+        ttl: float | None = 300.0,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[0] < self.clock()):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: K, value: V) -> None:
+        expires = self.clock() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class EntityCache:
+    """
+    Caches the entities looked up by primary key with `get` / `get_or_fail` of the
+    repository it is assigned to:
+
+        class CountryRepository(RepositoryBase[Country]):
+            entity_cache = EntityCache(maxsize=512, ttl=600)
+
+    Only the column values are kept. Read only services, eg:
+    `@session_manager(read_only=True)`, get a new detached snapshot of them, which
+    does not lazy load relationships. Other sessions get the snapshot merged without
+    loading, thus a persistent entity whose changes are flushed as usual.
+
+    Entities flushed, and the bulk statements of the repository, invalidate the
+    cache right away and again when the session ends its transaction, until then
+    that session bypasses the cache.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1_024,
+        ttl: float | None = 300.0,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.entries: LRUCache[EntityKey, dict[str, Any]] = LRUCache(
+            maxsize, ttl, clock
+        )
+        self.model: Type[DeclarativeBase] | None = None
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.model = resolve_model(owner)
+        _register(self)
+
+    def get(self, key: EntityKey) -> Any:
+        values = self.entries.get(key)
+        return None if values is None else snapshot(type_of(self), values)
+
+    def put(self, entity: DeclarativeBase) -> None:
+        values = column_values(entity)
+        primary_key = get_model_metadata(type(entity)).primary_key
+        self.entries.set(tuple(values[name] for name in primary_key), values)
+
+    def invalidate(self, key: EntityKey | None = None) -> None:
+        if key is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(key)
+
+
+class QueryCache:
+    """
+    Caches the results of `get_many` and `count` of the repository it is assigned
+    to, keyed on the statement and its parameters, thus on the filters,
+    order, limit and offset:
+
+        class CountryRepository(RepositoryBase[Country]):
+            query_cache = QueryCache(maxsize=256, ttl=30)
+
+    Cached entities are returned like those of EntityCache. Any write to the
+    model through a repository or a flush clears the cache, right away and again
+    when the session commits.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float | None = 30.0,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.results: LRUCache[Hashable, Any] = LRUCache(maxsize, ttl, clock)
+        self.model: Type[DeclarativeBase] | None = None
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.model = resolve_model(owner)
+        _register(self)
+
+    @property
+    def hits(self) -> int:
+        return self.results.hits
+
+    @property
+    def misses(self) -> int:
+        return self.results.misses
+
+    def key(
+        self, statement: ClauseElement, params: Mapping[str, Any] | None = None
+    ) -> Hashable:
+        """
+        Keys on the SQLAlchemy cache key of the statement, which is memoized on the
+        statement, and the values bound to it. Only statements SQLAlchemy can not
+        cache are compiled.
+        """
+        cache_key = statement._generate_cache_key()
+        if cache_key is None:
+            compiled = statement.compile()
+            shape: Hashable = str(compiled)
+            bound = list(compiled.params.values())
+        else:
+            shape = cache_key.key
+            bound = [bind.effective_value for bind in cache_key.bindparams]
+        return shape, _hashable(bound), _hashable(list((params or {}).items()))
+
+    def get_entities(self, key: Hashable) -> list[Any] | None:
+        rows: tuple[dict[str, Any], ...] | None = self.results.get(key)
+        if rows is None:
+            return None
+        return [snapshot(type_of(self), values) for values in rows]
+
+    def put_entities(self, key: Hashable, entities: Sequence[Any]) -> None:
+        self.results.set(key, tuple(column_values(entity) for entity in entities))
+
+    def get_scalar(self, key: Hashable) -> Any:
+        return self.results.get(key)
+
+    def put_scalar(self, key: Hashable, value: Any) -> Any:
+        self.results.set(key, value)
+        return value
+
+    def invalidate(self, key: EntityKey | None = None) -> None:
+        self.results.clear()
+
+
+def type_of(cache: ModelCache) -> Type[DeclarativeBase]:
+    if cache.model is None:
+        raise AttributeError("Cache is not assigned to a repository")
+    return cache.model
+
+
+def column_values(entity: DeclarativeBase) -> dict[str, Any]:
+    metadata = get_model_metadata(type(entity))
+    return dict(zip(metadata.column_names, metadata.values(entity)))
+
+
+def snapshot(model: Type[DeclarativeBase], values: dict[str, Any]) -> Any:
+    """
+    Returns a new detached entity holding the given column values.
+    """
+    entity = inspect(model).class_manager.new_instance()
+    for name, value in values.items():
+        set_committed_value(entity, name, value)  # type: ignore[no-untyped-call]
+    make_transient_to_detached(entity)
+    return entity
+
+
+def _hashable(value: Any) -> Hashable:
+    if isinstance(value, Mapping):
+        return tuple(sorted((key, _hashable(v)) for key, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(_hashable(v) for v in value)
+    return value  # type: ignore[no-any-return]
+
+
+_model_caches: defaultdict[type, list[ModelCache]] = defaultdict(list)
+
+
+def _register(cache: ModelCache) -> None:
+    if not _model_caches:
+        event.listen(Session, "after_flush", _invalidate_flushed)
+        event.listen(Session, "after_commit", _invalidate_recorded)
+        event.listen(Session, "after_rollback", _invalidate_recorded)
+    _model_caches[type_of(cache)].append(cache)
+
+
+def invalidate_caches(
+    session: Session, model: Type[DeclarativeBase], key: EntityKey | None = None
+) -> None:
+    """
+    Invalidates the caches of the model, the entity caches only drop the entity of the
+    given primary key if any, right away and again when the session commits or rolls
+    back, as other sessions may cache the values committed before.
+    """
+    if model not in _model_caches:
+        return
+    for cache in _model_caches[model]:
+        cache.invalidate(key)
+    session.info.setdefault("cache_invalidations", set()).add((model, key))
+
+
+def is_read_only(session: Session) -> bool:
+    """
+    Tells whether the session runs a read only service, which gets the cached
+    entities as detached snapshots instead of merged into the session.
+    """
+    return bool(session.info.get("read_only", False))
+
+
+def is_cacheable(session: Session, model: Type[DeclarativeBase]) -> bool:
+    """
+    Tells whether the session reads the committed state of the model, the results
+    of a session that wrote to the model, flushed or not, are not cached until it
+    commits. Checked again after executing a query, as it may autoflush.
+    """
+    invalidations: set[Invalidation] = session.info.get("cache_invalidations", set())
+    return all(written is not model for written, _ in invalidations) and not any(
+        type(entity) is model
+        for entity in (*session.new, *session.dirty, *session.deleted)
+    )
+
+
+def _invalidate_flushed(session: Session, _: Any) -> None:
+    for entity in (*session.new, *session.dirty, *session.deleted):
+        if type(entity) in _model_caches:
+            mapper = inspect(entity).mapper
+            invalidate_caches(
+                session, type(entity), tuple(mapper.primary_key_from_instance(entity))
+            )
+
+
+def _invalidate_recorded(session: Session) -> None:
+    invalidations: set[Invalidation] = session.info.pop("cache_invalidations", set())
+    for model, key in invalidations:
+        for cache in _model_caches[model]:
+            cache.invalidate(key)
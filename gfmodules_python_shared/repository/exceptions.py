@@ -1,4 +1,4 @@
-from typing import Type
+from typing import Any, Iterable, Type
 
 from sqlalchemy.exc import NoResultFound
 
@@ -6,5 +6,15 @@ from gfmodules_python_shared.schema.sql_model import SQLModelBase
 
 
 class EntryNotFound(NoResultFound):
-    def __init__(self, model: Type[SQLModelBase]) -> None:
-        super().__init__(f"No result found in {model.__name__}")
+    def __init__(
+        self, model: Type[SQLModelBase], missing: Iterable[Any] | None = None
+    ) -> None:
+        self.missing = set(missing or ())
+        message = f"No result found in {model.__name__}"
+        if self.missing:
+            message += f" for {', '.join(sorted(map(str, self.missing)))}"
+        super().__init__(message)
+
+
+class InvalidCursor(ValueError):
+    pass
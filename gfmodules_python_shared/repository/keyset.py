@@ -0,0 +1,193 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Iterable, NamedTuple, Sequence, Type
+from uuid import UUID
+
+from sqlalchemy import and_, false, inspect, or_, tuple_
+from sqlalchemy.orm import QueryableAttribute
+from sqlalchemy.orm.exc import UnmappedColumnError
+from sqlalchemy.sql.elements import ColumnElement, UnaryExpression
+from sqlalchemy.sql.expression import ColumnExpressionArgument
+from sqlalchemy.sql.operators import desc_op
+
+from gfmodules_python_shared.repository.exceptions import InvalidCursor
+from gfmodules_python_shared.schema.model_metadata import get_model_metadata
+from gfmodules_python_shared.schema.sql_model import SQLModelBase
+
+
+class KeysetColumn(NamedTuple):
+    attribute: str
+    column: ColumnElement[Any]
+    descending: bool
+    # NULLs are ordered last, whatever the direction
+    nullable: bool = False
+
+
+def _keyset_column(model: Type[SQLModelBase], clause: Any) -> KeysetColumn:
+    descending = False
+    if isinstance(clause, UnaryExpression) and clause.modifier is not None:
+        descending = clause.modifier is desc_op
+        clause = clause.element
+
+    if isinstance(clause, str):
+        if clause not in inspect(model).column_attrs:
+            raise ValueError(f"{clause} is not a column in the {model.__name__}")
+        clause = getattr(model, clause)
+
+    if isinstance(clause, QueryableAttribute):
+        key = clause.key
+    else:
+        try:
+            key = inspect(model).get_property_by_column(clause).key
+        except UnmappedColumnError as e:
+            raise ValueError(f"{clause} is not a column in the {model.__name__}") from e
+
+    return KeysetColumn(key, getattr(model, key), descending, _is_nullable(model, key))
+
+
+def _is_nullable(model: Type[SQLModelBase], key: str) -> bool:
+    return any(
+        getattr(column, "nullable", False)
+        for column in inspect(model).attrs[key].columns
+    )
+
+
+def keyset_columns(
+    model: Type[SQLModelBase],
+    order_by: Iterable[ColumnExpressionArgument[Any] | str],
+) -> tuple[KeysetColumn, ...]:
+    """
+    Resolves an order by clause into the columns used to seek a page, the primary
+    key columns are appended as tiebreaker so that every row has a unique position.
+    """
+    columns: dict[str, KeysetColumn] = {}
+    for clause in order_by:
+        column = _keyset_column(model, clause)
+        columns.setdefault(column.attribute, column)
+
+    for key in get_model_metadata(model).primary_key:
+        columns.setdefault(key, KeysetColumn(key, getattr(model, key), False))
+
+    return tuple(columns.values())
+
+
+def keyset_order_by(columns: Sequence[KeysetColumn]) -> list[ColumnElement[Any]]:
+    order_by = [c.column.desc() if c.descending else c.column.asc() for c in columns]
+    return [
+        clause.nulls_last() if c.nullable else clause
+        for c, clause in zip(columns, order_by)
+    ]
+
+
+def keyset_order(
+    model: Type[SQLModelBase],
+    order_by: Sequence[ColumnExpressionArgument[Any] | str],
+) -> list[ColumnExpressionArgument[Any] | str]:
+    """
+    Orders by the keyset columns when the order by clause consists of columns only,
+    thus pages by offset and by cursor list the rows alike. Any other clause (eg:
+    func.lower(User.name)) can not be paged by cursor, the rows are then ordered by
+    the clause as given followed by the primary key columns.
+    """
+    try:
+        return [*keyset_order_by(keyset_columns(model, order_by))]
+    except ValueError:
+        primary_key = get_model_metadata(model).primary_key
+        return [*order_by, *(getattr(model, key) for key in primary_key)]
+
+
+def keyset_predicate(
+    columns: Sequence[KeysetColumn], values: Sequence[Any]
+) -> ColumnElement[bool]:
+    """
+    Generates the seek condition for the rows following the given values:
+    eg: (created_at, id) > (:created_at, :id) when all columns share a direction
+    and are not nullable, otherwise:
+    created_at > :created_at OR (created_at = :created_at AND id < :id)
+    where the NULLs of nullable columns follow every value.
+    """
+    if len(columns) != len(values):
+        raise InvalidCursor("Cursor does not match the order of the query")
+
+    if len({c.descending for c in columns}) == 1 and not any(
+        c.nullable for c in columns
+    ):
+        left = tuple_(*(c.column for c in columns))
+        right = tuple_(*values)
+        return left < right if columns[0].descending else left > right
+
+    return or_(
+        *(
+            and_(
+                *(_equals(c, v) for c, v in zip(columns[:i], values[:i])),
+                _follows(columns[i], values[i]),
+            )
+            for i in range(len(columns))
+        )
+    )
+
+
+def _equals(column: KeysetColumn, value: Any) -> ColumnElement[bool]:
+    return column.column.is_(None) if value is None else column.column == value
+
+
+def _follows(column: KeysetColumn, value: Any) -> ColumnElement[bool]:
+    if value is None:
+        return false()
+    follows = column.column < value if column.descending else column.column > value
+    return or_(follows, column.column.is_(None)) if column.nullable else follows
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, UUID):
+        return {"uuid": str(value)}
+    if isinstance(value, datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"date": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"decimal": str(value)}
+    return value
+
+
+_DECODERS: dict[str, Callable[[str], Any]] = {
+    "uuid": UUID,
+    "datetime": datetime.fromisoformat,
+    "date": date.fromisoformat,
+    "decimal": Decimal,
+}
+
+
+def _decode_value(value: dict[str, Any]) -> Any:
+    if len(value) == 1 and (tag := next(iter(value))) in _DECODERS:
+        if not isinstance(value[tag], str):
+            raise TypeError(f"{tag} of the cursor is not a string")
+        return _DECODERS[tag](value[tag])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([_encode_value(value) for value in values])
+    return urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        values = json.loads(
+            urlsafe_b64decode(cursor.encode()), object_hook=_decode_value
+        )
+    except (
+        BinasciiError,
+        UnicodeDecodeError,
+        ValueError,
+        TypeError,
+        InvalidOperation,
+    ) as e:
+        raise InvalidCursor("Cursor is malformed") from e
+
+    if not isinstance(values, list):
+        raise InvalidCursor("Cursor is malformed")
+    return values
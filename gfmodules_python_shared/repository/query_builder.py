@@ -0,0 +1,381 @@
+from abc import ABCMeta, abstractmethod
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Mapping,
+    Sequence,
+    Type,
+    TypeAlias,
+    TypeVar,
+    Union,
+    cast,
+)
+from uuid import UUID, uuid4
+
+from more_itertools import chunked
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    Select,
+    Table,
+    bindparam,
+    func,
+    inspect,
+    select,
+)
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import InstrumentedAttribute, Load, Mapper
+from sqlalchemy.sql.expression import ColumnExpressionArgument
+from sqlalchemy.types import TypeEngine
+
+from gfmodules_python_shared.schema.model_metadata import ModelMetadata
+from gfmodules_python_shared.schema.sql_model import TSQLModel
+
+from .cache import EntityCache, EntityKey, QueryCache
+from .keyset import (
+    decode_cursor,
+    encode_cursor,
+    keyset_columns,
+    keyset_order,
+    keyset_order_by,
+    keyset_predicate,
+)
+from .sql_model_descriptor import ModelDescriptor, ModelMetadataDescriptor
+from .statement_cache import StatementCache
+
+T = TypeVar("T")
+S = TypeVar("S")
+GetKwargs: TypeAlias = Union[str, int, UUID, Dict[str, str], None]
+LoadStrategy: TypeAlias = Literal["selectin", "joined", "subquery", "raise", "noload"]
+# relationship path, eg: "posts" or "posts.comments", to its loading strategy
+LoadOptions: TypeAlias = Mapping[str, LoadStrategy]
+
+LOADERS: Mapping[LoadStrategy, str] = {
+    "selectin": "selectinload",
+    "joined": "joinedload",
+    "subquery": "subqueryload",
+    "raise": "raiseload",
+    "noload": "noload",
+}
+# names of the bound limit and offset parameters, apart from the filter columns
+LIMIT = "_limit"
+OFFSET = "_offset"
+
+
+class QueryBuilder(Generic[TSQLModel], metaclass=ABCMeta):
+    """
+    Builds the statements of the repository operations, independent of the session
+    they are executed with.
+    """
+
+    model: Type[TSQLModel] = ModelDescriptor()  # type: ignore # lazy load model type at runtime
+    model_metadata: ModelMetadata = ModelMetadataDescriptor()  # type: ignore
+
+    property_lookup_chunk_size: int = 1_000
+    property_lookup_join_threshold: int = 10_000
+    entity_cache: EntityCache | None = None
+    query_cache: QueryCache | None = None
+    # shared by the repositories, keyed per repository class as the order_by of a
+    # repository is assumed not to vary, None builds the statements on every call
+    statement_cache: StatementCache | None = StatementCache()
+    # default loading of relationships, merged with the load given per call
+    load: LoadOptions = MappingProxyType({})
+
+    @property
+    @abstractmethod
+    def order_by(self) -> tuple[ColumnExpressionArgument[Any] | str, ...]: ...
+
+    def cursor_of(
+        self,
+        entity: TSQLModel,
+        order_by: Iterable[ColumnExpressionArgument[Any] | str] | None = None,
+    ) -> str:
+        """
+        Returns the opaque cursor pointing after the given entity, to be used with
+        the same order_by given to `get_many`. Raises a ValueError when the order
+        is not on columns only, which can not be paged by cursor.
+        """
+        columns = keyset_columns(self.model, self._order_by(order_by))
+        return encode_cursor([getattr(entity, c.attribute) for c in columns])
+
+    def _cursor_after(
+        self,
+        entity: TSQLModel,
+        order_by: Iterable[ColumnExpressionArgument[Any] | str] | None = None,
+    ) -> str | None:
+        """
+        Returns the cursor of `cursor_of`, or None when the order can not be paged by
+        cursor, eg: when ordering by func.lower(User.name).
+        """
+        try:
+            return self.cursor_of(entity, order_by)
+        except ValueError:
+            return None
+
+    def _get_statement(self, **kwargs: GetKwargs) -> Select[tuple[TSQLModel]]:
+        """
+        Selects the entities matching the filters, which are bound by name, thus
+        the statement is executed with the `_params` of the filters:
+        eg: SELECT * FROM users WHERE users.email = :email
+        """
+        self._validate_kwargs(**kwargs)
+        names = self._filter_names(kwargs)
+        return self._cached(
+            ("get", names), lambda: self._filtered(select(self.model), names)
+        )
+
+    def _get_many_statement(
+        self,
+        *,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        order_by: Iterable[ColumnExpressionArgument[Any] | str] | None = None,
+        **kwargs: GetKwargs,
+    ) -> Select[tuple[TSQLModel]]:
+        """
+        Selects a page of the entities matching the filters, bound by name like the
+        limit and offset, see `_get_statement`. Statements seeking a cursor or with
+        a custom order are not cached.
+        """
+        if offset and cursor:
+            raise ValueError("Either offset or cursor not both")
+        self._validate_kwargs(**kwargs)
+
+        names = self._filter_names(kwargs)
+        paged = limit is not None, offset is not None
+
+        def build() -> Select[tuple[TSQLModel]]:
+            stmt = self._filtered(select(self.model), names)
+            if cursor is None:
+                order = keyset_order(self.model, self._order_by(order_by))
+            else:
+                columns = keyset_columns(self.model, self._order_by(order_by))
+                stmt = stmt.where(keyset_predicate(columns, decode_cursor(cursor)))
+                order = [*keyset_order_by(columns)]
+            if limit is not None:
+                stmt = stmt.limit(bindparam(LIMIT, type_=Integer))
+            if offset is not None:
+                stmt = stmt.offset(bindparam(OFFSET, type_=Integer))
+            return stmt.order_by(*order)
+
+        if cursor is not None or order_by is not None:
+            return build()
+        return self._cached(("get_many", names, *paged), build)
+
+    def _projection_statement(
+        self,
+        columns: Sequence[str],
+        *,
+        limit: int | None = None,
+        offset: int | None = None,
+        cursor: str | None = None,
+        order_by: Iterable[ColumnExpressionArgument[Any] | str] | None = None,
+        **kwargs: GetKwargs,
+    ) -> Select[Any]:
+        """
+        Selects only the given columns of the entities of `get_many`:
+        eg: SELECT users.id, users.email FROM users WHERE ... ORDER BY users.id
+        """
+        return self._get_many_statement(
+            limit=limit, offset=offset, cursor=cursor, order_by=order_by, **kwargs
+        ).with_only_columns(*self._columns(columns))
+
+    def _count_statement(self, **kwargs: GetKwargs) -> Select[tuple[int]]:
+        self._validate_kwargs(**kwargs)
+        names = self._filter_names(kwargs)
+        return self._cached(
+            ("count", names),
+            lambda: self._filtered(select(func.count()).select_from(self.model), names),
+        )
+
+    def _params(
+        self,
+        kwargs: Mapping[str, GetKwargs],
+        limit: int | None = None,
+        offset: int | None = None,
+    ) -> Dict[str, Any]:
+        """
+        Returns the parameters the statements are executed with.
+        """
+        params: Dict[str, Any] = {
+            name: value for name, value in kwargs.items() if value is not None
+        }
+        if limit is not None:
+            params[LIMIT] = limit
+        if offset is not None:
+            params[OFFSET] = offset
+        return params
+
+    def _filter_names(
+        self, kwargs: Mapping[str, GetKwargs]
+    ) -> tuple[tuple[str, bool], ...]:
+        """
+        Returns the shape of the filters, their sorted names and whether they filter
+        on NULL, which is compared with IS NULL instead of bound:
+        eg: {"email": "a@b.c", "deleted_at": None} results in
+        (("deleted_at", True), ("email", False))
+        """
+        return tuple(sorted((name, value is None) for name, value in kwargs.items()))
+
+    def _filtered(
+        self, stmt: Select[tuple[T]], names: Iterable[tuple[str, bool]]
+    ) -> Select[tuple[T]]:
+        return stmt.where(
+            *(
+                self.model_metadata.attributes[name].is_(None)
+                if is_null
+                else self.model_metadata.attributes[name] == bindparam(name)
+                for name, is_null in names
+            )
+        )
+
+    def _cached(self, key: tuple[Hashable, ...], build: Callable[[], S]) -> S:
+        if self.statement_cache is None:
+            return build()
+        return self.statement_cache.get((type(self), *key), build)
+
+    def _lookup_statements(
+        self,
+        stmt: Select[tuple[T]],
+        column: InstrumentedAttribute[Any],
+        values: List[Any],
+    ) -> Iterator[Select[tuple[T]]]:
+        """
+        Generates an expanding IN per chunk of `property_lookup_chunk_size` values:
+        eg: SELECT * FROM users WHERE users.email IN (:email_1, :email_2)
+        """
+        for chunk in chunked(values, self.property_lookup_chunk_size):
+            yield stmt.where(column.in_(chunk))
+
+    def _lookup_table(self, column: InstrumentedAttribute[Any]) -> Table:
+        """
+        Defines a temporary table holding lookup values of the given column's type.
+        It is dropped once the lookup succeeded, when the lookup fails PostgreSQL
+        drops it as the transaction ends and other databases as the connection closes.
+        """
+        return Table(
+            f"lookup_{uuid4().hex}",
+            MetaData(),
+            Column("value", column.type, primary_key=True),
+            prefixes=["TEMPORARY"],
+            postgresql_on_commit="DROP",
+        )
+
+    def _load_options(self, load: LoadOptions | None) -> LoadOptions:
+        return self.load if load is None else {**self.load, **load}
+
+    def _joins(self, load: LoadOptions | None) -> bool:
+        """
+        Tells whether relationships are joined eagerly, the joined rows of a collection
+        repeat its parent, thus the results must be made unique.
+        """
+        return "joined" in self._load_options(load).values()
+
+    def _with_loaders(
+        self, stmt: Select[tuple[T]], load: LoadOptions | None
+    ) -> Select[tuple[T]]:
+        """
+        Applies the loader option of every relationship path:
+        eg: {"posts": "selectin", "posts.comments": "raise"} results in
+        selectinload(User.posts), defaultload(User.posts).raiseload(Post.comments)
+        """
+        if not (load := self._load_options(load)):
+            return stmt
+        return stmt.options(
+            *(self._loader(path, strategy) for path, strategy in load.items())
+        )
+
+    def _loader(self, path: str, strategy: LoadStrategy) -> Load:
+        option, mapper = Load(self.model), inspect(self.model)
+        *parents, name = path.split(".")
+        for parent in parents:
+            relationship = self._relationship(mapper, parent)
+            option, mapper = option.defaultload(relationship), relationship.mapper
+        return cast(
+            Load, getattr(option, LOADERS[strategy])(self._relationship(mapper, name))
+        )
+
+    def _relationship(
+        self, mapper: Mapper[Any], name: str
+    ) -> InstrumentedAttribute[Any]:
+        if name not in mapper.relationships:
+            raise AttributeError(
+                f"{name} is not a relationship in the {mapper.class_.__name__}"
+            )
+        return cast(InstrumentedAttribute[Any], getattr(mapper.class_, name))
+
+    def _columns(self, columns: Sequence[str]) -> list[InstrumentedAttribute[Any]]:
+        if not columns:
+            raise ValueError("No columns given to select")
+        self._validate_columns(columns)
+        return [self.model_metadata.attributes[column] for column in columns]
+
+    def _lookup_values(self, values: List[Any]) -> tuple[List[Any], bool]:
+        """
+        Returns the unique lookup values other than None, and whether None is given,
+        which is looked up with IS NULL as neither IN nor the join match NULL.
+        """
+        unique = dict.fromkeys(values)
+        null = None in unique
+        unique.pop(None, None)
+        return list(unique), null
+
+    def _use_lookup_table(self, values: List[Any]) -> bool:
+        return len(values) > self.property_lookup_join_threshold
+
+    def _property_column(self, attribute: str) -> InstrumentedAttribute[Any]:
+        if attribute not in self.model_metadata.columns:
+            raise AttributeError(
+                f"{attribute} is not a column in the {self.model.__name__}"
+            )
+        return self.model_metadata.attributes[attribute]
+
+    def _order_by(
+        self, order_by: Iterable[ColumnExpressionArgument[Any] | str] | None
+    ) -> tuple[ColumnExpressionArgument[Any] | str, ...]:
+        return self.order_by if order_by is None else (*self.order_by, *order_by)
+
+    def _entity_cache_key(self, kwargs: Dict[str, GetKwargs]) -> EntityKey | None:
+        """
+        Returns the primary key looked up by the given filters when the repository
+        caches entities, values are coerced to the column type, eg: str to UUID.
+        """
+        if self.entity_cache is None or kwargs.keys() != set(
+            self.model_metadata.primary_key
+        ):
+            return None
+        try:
+            return tuple(
+                _coerce(getattr(self.model, name).type, kwargs[name])
+                for name in self.model_metadata.primary_key
+            )
+        except (TypeError, ValueError):
+            return None
+
+    def _validate_kwargs(self, **kwargs: GetKwargs) -> None:
+        self._validate_columns(kwargs)
+
+    def _validate_columns(self, columns: Iterable[str]) -> None:
+        # check if columns are a subset of column names for a given model
+        if args := ", ".join(set(columns) - self.model_metadata.columns):
+            raise InvalidRequestError(
+                f"{args} is not a column in the {self.model.__name__}"
+            )
+
+
+def _coerce(column_type: TypeEngine[Any], value: Any) -> Any:
+    try:
+        python_type = column_type.python_type
+    except NotImplementedError:
+        return value
+    return value if isinstance(value, python_type) else python_type(value)
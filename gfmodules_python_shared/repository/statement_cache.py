@@ -0,0 +1,65 @@
+from collections.abc import Callable, Hashable
+from typing import Any, TypeVar
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine.interfaces import CacheStats
+
+from .cache import LRUCache
+
+S = TypeVar("S")
+
+
+class StatementCache:
+    """
+    Caches the statements of the repository queries by the shape of their filters,
+    the filter values, limit and offset are bound by name when executed. A cached
+    statement is built, and its SQLAlchemy cache key generated, only once.
+    """
+
+    def __init__(self, maxsize: int = 1_024) -> None:
+        self.statements: LRUCache[Hashable, Any] = LRUCache(maxsize, ttl=None)
+
+    @property
+    def hits(self) -> int:
+        return self.statements.hits
+
+    @property
+    def misses(self) -> int:
+        return self.statements.misses
+
+    def get(self, key: Hashable, build: Callable[[], S]) -> S:
+        statement: S | None = self.statements.get(key)
+        if statement is None:
+            statement = build()
+            self.statements.set(key, statement)
+        return statement
+
+
+class CompileCacheStats:
+    """
+    Counts the statements executed on the engine whose compiled form was found in the
+    SQLAlchemy compiled cache, eg: `CompileCacheStats().listen(engine).hit_ratio`.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def listen(self, engine: Engine) -> "CompileCacheStats":
+        event.listen(engine, "before_cursor_execute", self._count)
+        return self
+
+    def remove(self, engine: Engine) -> None:
+        event.remove(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args: Any) -> None:
+        cache_hit = getattr(args[4], "cache_hit", None)
+        if cache_hit is CacheStats.CACHE_HIT:
+            self.hits += 1
+        elif cache_hit is CacheStats.CACHE_MISS:
+            self.misses += 1
@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+from functools import cache, lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Mapping, Type
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import DeclarativeBase, InstrumentedAttribute
+
+
+@dataclass(frozen=True)
+class ModelMetadata:
+    """
+    Column information of a mapped model, resolved once per model class so that
+    queries and serialization do not walk the table on every call.
+    """
+
+    model: Type[DeclarativeBase]
+    column_names: tuple[str, ...]
+    columns: frozenset[str]
+    primary_key: tuple[str, ...]
+    attributes: Mapping[str, InstrumentedAttribute[Any]]
+    values: Callable[[Any], tuple[Any, ...]]
+
+
+@lru_cache(maxsize=256)
+def values_getter(names: tuple[str, ...]) -> Callable[[Any], tuple[Any, ...]]:
+    """
+    Returns an attrgetter extracting the values of the given attributes as a tuple,
+    also when a single or no attribute is given.
+    """
+    if not names:
+        return lambda _: ()
+    getter = attrgetter(*names)
+    if len(names) == 1:
+        return lambda entity: (getter(entity),)
+    return getter
+
+
+@cache
+def get_model_metadata(model: Type[DeclarativeBase]) -> ModelMetadata:
+    mapper = inspect(model)
+    column_names = tuple(column.name for column in model.__table__.columns)
+    return ModelMetadata(
+        model=model,
+        column_names=column_names,
+        columns=frozenset(column_names),
+        primary_key=tuple(
+            mapper.get_property_by_column(column).key for column in mapper.primary_key
+        ),
+        attributes={name: getattr(model, name) for name in column_names},
+        values=values_getter(column_names),
+    )
@@ -1,4 +1,4 @@
-from typing import Generic, List, TypeVar
+from typing import Generic, List, Optional, TypeVar
 
 from gfmodules_python_shared.schema.base_model_schema import BaseModelConfig
 
@@ -13,4 +13,6 @@ class Page(BaseModelConfig, Generic[T]):
     items: List[T]
     limit: int
     offset: int
-    total: int
+    total: Optional[int]
+    next_cursor: Optional[str] = None
+    has_next: Optional[bool] = None
@@ -1,33 +1,72 @@
-from typing import Any, Iterator, TypeVar
+from typing import Any, Iterable, Self, TypeVar
 from uuid import UUID
 
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm.exc import DetachedInstanceError
 
+from gfmodules_python_shared.schema.model_metadata import (
+    get_model_metadata,
+    values_getter,
+)
+
 
 class SQLModelBase(DeclarativeBase):
     __abstract__ = True
 
-    def __column_name_iter(
-        self, exclude: set[str] | None = None, include: set[str] | None = None
-    ) -> Iterator[str]:
+    @classmethod
+    def __column_names(
+        cls, exclude: set[str] | None = None, include: set[str] | None = None
+    ) -> tuple[str, ...]:
+        if exclude and include:
+            raise ValueError("Either exclude or include not both")
         if include:
-            return iter(include)
-        columns = (column.name for column in self.__table__.columns)
+            return tuple(include)
+        columns = get_model_metadata(cls).column_names
         if exclude:
-            return (column for column in columns if column not in exclude)
+            return tuple(column for column in columns if column not in exclude)
         return columns
 
     def to_dict(
         self, *, exclude: set[str] | None = None, include: set[str] | None = None
     ) -> dict[str, Any]:
-        if exclude and include:
-            raise ValueError("Either exclude or include not both")
+        if not (exclude or include):
+            metadata = get_model_metadata(type(self))
+            return dict(zip(metadata.column_names, metadata.values(self)))
+
+        names = self.__column_names(exclude, include)
+        return dict(zip(names, values_getter(names)(self)))
 
-        return {
-            column: getattr(self, column)
-            for column in self.__column_name_iter(exclude, include)
-        }
+    @classmethod
+    def to_dicts(
+        cls,
+        entities: Iterable[Self],
+        *,
+        exclude: set[str] | None = None,
+        include: set[str] | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Serializes the entities to a list of dicts, resolving the columns once.
+        """
+        names = cls.__column_names(exclude, include)
+        getter = values_getter(names)
+        return [dict(zip(names, getter(entity))) for entity in entities]
+
+    @classmethod
+    def to_columns(
+        cls,
+        entities: Iterable[Self],
+        *,
+        exclude: set[str] | None = None,
+        include: set[str] | None = None,
+    ) -> dict[str, list[Any]]:
+        """
+        Serializes the entities to a dict holding the list of values per column:
+        eg: {"id": [1, 2], "name": ["John", "Jane"]}
+        """
+        names = cls.__column_names(exclude, include)
+        rows = map(values_getter(names), entities)
+        columns = list(map(list, zip(*rows))) or [[] for _ in names]
+        return dict(zip(names, columns))
 
     @staticmethod
     def __value_repr(value: Any) -> str:
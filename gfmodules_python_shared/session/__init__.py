@@ -1,4 +1,35 @@
-from .healthy import is_healthy_database
+from .async_session_manager import async_session_manager
+from .circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    register_circuit_breaker,
+)
+from .healthy import HealthChecker, database_health, is_healthy_database
+from .query_budget import (
+    QueryBudget,
+    QueryBudgetExceeded,
+    register_query_budget,
+    unregister_query_budget,
+)
+from .read_replicas import ReplicaRouter, register_read_replicas
+from .retry_policy import RetriesExhaustedError, RetryPolicy
 from .session_manager import session_manager
 
-__all__ = ["is_healthy_database", "session_manager"]
+__all__ = [
+    "async_session_manager",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "database_health",
+    "HealthChecker",
+    "is_healthy_database",
+    "QueryBudget",
+    "QueryBudgetExceeded",
+    "register_circuit_breaker",
+    "register_query_budget",
+    "register_read_replicas",
+    "ReplicaRouter",
+    "RetriesExhaustedError",
+    "RetryPolicy",
+    "session_manager",
+    "unregister_query_budget",
+]
@@ -0,0 +1,171 @@
+from collections.abc import Awaitable, Callable, Coroutine
+from functools import wraps
+from time import perf_counter
+from typing import Any, ParamSpec, TypeAlias, TypeVar, overload
+
+import inject
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from gfmodules_python_shared.instrumentation import (
+    current_metrics,
+    get_instrumentation_sink,
+    instrument_engine,
+    instrumented,
+    record_connect_wait,
+)
+from gfmodules_python_shared.repository.async_base import AsyncGenericRepository
+
+from .circuit_breaker import circuit
+from .query_budget import QueryBudget, get_query_budget
+from .read_replicas import get_replica_router
+from .retry_policy import DEFAULT_RETRY_POLICY, RetryPolicy
+from .session_manager import (
+    READ_ONLY_TRANSACTION_DIALECTS,
+    refresh_statements,
+    repository_parameters,
+    service_name,
+    session_options,
+)
+
+T = TypeVar("T")
+P = ParamSpec("P")
+
+AsyncSessionMaker = async_sessionmaker[AsyncSession]
+AsyncService: TypeAlias = Callable[P, Awaitable[T]]
+DecoratedAsyncService: TypeAlias = Callable[P, Coroutine[Any, Any, T]]
+
+
+async def async_sync_value_with_database(session: AsyncSession, value: Any) -> None:
+    for stmt in refresh_statements(session.sync_session, value):
+        (await session.execute(stmt)).all()
+
+
+def async_read_only_service(
+    session: AsyncSession, service: AsyncService[P, T]
+) -> DecoratedAsyncService[P, T]:
+    read_only = session.get_bind().dialect.name in READ_ONLY_TRANSACTION_DIALECTS
+
+    @wraps(service)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        session.info["read_only"] = True
+        if read_only:
+            await session.execute(text("SET TRANSACTION READ ONLY"))
+        value = await service(*args, **kwargs)
+        session.expunge_all()
+        return value
+
+    return wrapper
+
+
+def async_measured_service(
+    session: AsyncSession, service: AsyncService[P, T]
+) -> AsyncService[P, T]:
+    if current_metrics() is None:
+        return service
+    instrument_engine(session.get_bind())
+
+    @wraps(service)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        started = perf_counter()
+        await session.connection()
+        record_connect_wait(perf_counter() - started)
+        return await service(*args, **kwargs)
+
+    return wrapper
+
+
+async def async_service_transaction_retry_policy(
+    session: AsyncSession,
+    service: AsyncService[P, T],
+    *args: P.args,
+    **kwargs: P.kwargs,
+) -> T:
+    return await DEFAULT_RETRY_POLICY.run_async(session, service, *args, **kwargs)
+
+
+@overload
+def async_session_manager(
+    service: AsyncService[P, T],
+) -> DecoratedAsyncService[P, T]: ...
+
+
+@overload
+def async_session_manager(
+    *,
+    refresh: bool = True,
+    read_only: bool = False,
+    retry_policy: RetryPolicy | None = None,
+    query_budget: QueryBudget | None = None,
+) -> Callable[[AsyncService[P, T]], DecoratedAsyncService[P, T]]: ...
+
+
+def async_session_manager(
+    service: AsyncService[P, T] | None = None,
+    *,
+    refresh: bool = True,
+    read_only: bool = False,
+    retry_policy: RetryPolicy | None = None,
+    query_budget: QueryBudget | None = None,
+) -> (
+    DecoratedAsyncService[P, T]
+    | Callable[[AsyncService[P, T]], DecoratedAsyncService[P, T]]
+):
+    """
+    Asyncio counterpart of the session_manager decorator, the service is awaited
+    within a transaction of an AsyncSession requested from the injected
+    async_sessionmaker.
+
+    AsyncGenericRepository subclass parameters are instantiated with the requested
+    session and injected in the service operation signature, transient failures are
+    retried according to the retry policy without blocking the event loop. Read only
+    services are routed to the registered read replicas and run in a read only
+    transaction, measured into the registered instrumentation sink and held to the
+    query budget, like `session_manager`.
+    """
+
+    def decorator(service: AsyncService[P, T]) -> DecoratedAsyncService[P, T]:
+        repositories = repository_parameters(service, AsyncGenericRepository)
+        options = session_options(refresh, read_only)
+        qualified_name = service_name(service)
+
+        @wraps(service)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            async def run(session_maker: AsyncSessionMaker) -> T:
+                with circuit(session_maker):
+                    async with session_maker(**options) as session:
+                        for name, repository in repositories:
+                            kwargs[name] = repository(session)
+                        value = await (retry_policy or DEFAULT_RETRY_POLICY).run_async(
+                            session,
+                            async_measured_service(
+                                session,
+                                async_read_only_service(session, service)
+                                if read_only
+                                else service,
+                            ),
+                            *args,
+                            **kwargs,
+                        )
+                        if refresh and not read_only:
+                            await async_sync_value_with_database(session, value)
+                return value
+
+            session_maker = inject.instance(AsyncSessionMaker)
+            budget = query_budget or get_query_budget(session_maker)
+            with instrumented(
+                qualified_name,
+                get_instrumentation_sink(session_maker),
+                capture=budget is not None,
+            ) as metrics:
+                if read_only and (router := get_replica_router(session_maker)):
+                    value = await router.route_async(run)
+                else:
+                    value = await run(session_maker)
+                if budget is not None and metrics is not None:
+                    budget.enforce(metrics)
+                return value
+
+        return wrapper
+
+    return decorator if service is None else decorator(service)
@@ -0,0 +1,169 @@
+import logging
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from enum import Enum
+from threading import Lock
+from time import monotonic
+from typing import Any, ContextManager
+from weakref import WeakKeyDictionary
+
+from .retry_policy import RetriesExhaustedError, is_transient
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Rejects service calls while the database is failing instead of letting every
+    call wait for a connection and go through the retry cycle.
+
+    CLOSED: calls pass, `failure_threshold` consecutive failures open the circuit.
+    OPEN: calls are rejected with CircuitOpenError for `recovery_timeout` seconds.
+    HALF_OPEN: at most `half_open_max_calls` trial calls pass at once,
+    `success_threshold` successes close the circuit, a single failure opens it.
+
+    Only transient database errors count as failures, a service raising
+    EntryNotFound does not say anything about the health of the database.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        success_threshold: int = 1,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self.clock = clock
+
+        self.transitions: Counter[CircuitState] = Counter()
+        self.rejected = 0
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._successes = 0
+        self._trials = 0
+        self._opened_at = 0.0
+        self._lock = Lock()
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            self._half_open_when_recovered()
+            return self._state
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Returns the state and counters of the circuit for monitoring.
+        """
+        with self._lock:
+            self._half_open_when_recovered()
+            return {
+                "state": self._state.value,
+                "failures": self._failures,
+                "rejected": self.rejected,
+                "transitions": {
+                    state.value: self.transitions[state] for state in CircuitState
+                },
+            }
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        trial = self._acquire()
+        try:
+            yield
+        except Exception as e:
+            self._release(trial, failed=self.is_failure(e))
+            raise
+        self._release(trial, failed=False)
+
+    def is_failure(self, error: BaseException) -> bool:
+        return isinstance(error, RetriesExhaustedError) or is_transient(error)
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            self._half_open_when_recovered()
+            if self._state is CircuitState.CLOSED:
+                return False
+            if (
+                self._state is CircuitState.HALF_OPEN
+                and self._trials < self.half_open_max_calls
+            ):
+                self._trials += 1
+                return True
+
+            self.rejected += 1
+            raise CircuitOpenError(f"Circuit is {self._state.value}, call rejected")
+
+    def _release(self, trial: bool, failed: bool) -> None:
+        with self._lock:
+            if trial:
+                self._trials -= 1
+            if failed:
+                self._failures += 1
+                if (
+                    self._state is CircuitState.HALF_OPEN
+                    or self._failures >= self.failure_threshold
+                ):
+                    self._transition(CircuitState.OPEN)
+            elif self._state is CircuitState.HALF_OPEN and trial:
+                self._successes += 1
+                if self._successes >= self.success_threshold:
+                    self._transition(CircuitState.CLOSED)
+            elif self._state is CircuitState.CLOSED:
+                self._failures = 0
+
+    def _half_open_when_recovered(self) -> None:
+        if (
+            self._state is CircuitState.OPEN
+            and self.clock() - self._opened_at >= self.recovery_timeout
+        ):
+            self._transition(CircuitState.HALF_OPEN)
+
+    def _transition(self, state: CircuitState) -> None:
+        if state is self._state:
+            return
+        logger.warning(f"Circuit {self._state.value} -> {state.value}")
+        self._state = state
+        self._failures = self._successes = 0
+        if state is CircuitState.OPEN:
+            self._opened_at = self.clock()
+        self.transitions[state] += 1
+
+
+_circuit_breakers: WeakKeyDictionary[Any, CircuitBreaker] = WeakKeyDictionary()
+
+
+def register_circuit_breaker(
+    session_maker: Any, circuit_breaker: CircuitBreaker | None = None
+) -> CircuitBreaker:
+    """
+    Shares a circuit breaker between all services using the given (async)
+    sessionmaker, eg: `register_circuit_breaker(inject.instance(SessionMaker))`
+    in the container setup.
+    """
+    _circuit_breakers[session_maker] = circuit_breaker or CircuitBreaker()
+    return _circuit_breakers[session_maker]
+
+
+def get_circuit_breaker(session_maker: Any) -> CircuitBreaker | None:
+    return _circuit_breakers.get(session_maker)
+
+
+def circuit(session_maker: Any) -> ContextManager[None]:
+    circuit_breaker = _circuit_breakers.get(session_maker)
+    return nullcontext() if circuit_breaker is None else circuit_breaker.guard()
@@ -1,18 +1,155 @@
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Event, Lock, Thread
+from time import monotonic, perf_counter
+from typing import Any
 
 import inject
-from sqlalchemy import text
+from sqlalchemy import Pool, text
 from sqlalchemy.orm import Session, sessionmaker
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class HealthStatus:
+    healthy: bool
+    checked_at: float
+    latency: float | None = None
+    pool: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+
+def pool_statistics(pool: Pool) -> dict[str, Any]:
+    """
+    Returns the statistics the pool implementation exposes, eg: QueuePool reports
+    size, checked_in, checked_out and overflow while StaticPool reports none.
+    """
+    return {
+        name: getattr(pool, method)()
+        for name, method in (
+            ("size", "size"),
+            ("checked_in", "checkedin"),
+            ("checked_out", "checkedout"),
+            ("overflow", "overflow"),
+        )
+        if callable(getattr(pool, method, None))
+    }
+
+
+class HealthChecker:
+    """
+    Probes the database with `SELECT 1` every `interval` seconds on a background
+    thread and keeps the last status, callers read that status instead of each
+    opening a session. A status older than `ttl` is probed again on read.
+
+    A probe not answered within `timeout` reports the database unhealthy, a hung
+    probe is not started again until it returns.
+    """
+
+    def __init__(
+        self,
+        session_maker: sessionmaker[Session],
+        interval: float = 5.0,
+        ttl: float = 15.0,
+        timeout: float = 2.0,
+    ) -> None:
+        self.session_maker = session_maker
+        self.interval = interval
+        self.ttl = ttl
+        self.timeout = timeout
+
+        self._status: HealthStatus | None = None
+        self._probe_future: Future[HealthStatus] | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._lock = Lock()
+        self._stopped = Event()
+        self._thread: Thread | None = None
+
+    @property
+    def status(self) -> HealthStatus:
+        status = self._status
+        if status is None or monotonic() - status.checked_at > self.ttl:
+            status = self.check()
+        return status
+
+    def check(self) -> HealthStatus:
+        with self._lock:
+            if self._probe_future is None or self._probe_future.done():
+                self._probe_future = self._executor.submit(self._probe)
+            future = self._probe_future
+
+        try:
+            status = future.result(timeout=self.timeout)
+        except TimeoutError:
+            status = HealthStatus(
+                healthy=False,
+                checked_at=monotonic(),
+                error=f"probe timed out after {self.timeout} seconds",
+            )
+        if not status.healthy:
+            logger.info(f"Database is not healthy: {status.error}")
+
+        self._status = status
+        return status
+
+    def start(self) -> "HealthChecker":
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = Thread(target=self._run, name="health-checker", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            self.check()
+            if self._stopped.wait(self.interval):
+                return
+
+    def _probe(self) -> HealthStatus:
+        started = perf_counter()
+        try:
+            with self.session_maker() as session:
+                connection = session.connection()
+                pool_wait = perf_counter() - started
+                connection.execute(text("SELECT 1"))
+                return HealthStatus(
+                    healthy=True,
+                    checked_at=monotonic(),
+                    latency=perf_counter() - started,
+                    pool={
+                        **pool_statistics(connection.engine.pool),
+                        "wait_time": pool_wait,
+                    },
+                )
+        except Exception as e:
+            return HealthStatus(healthy=False, checked_at=monotonic(), error=str(e))
+
+
+_health_checkers: dict[Any, HealthChecker] = {}
+_health_checkers_lock = Lock()
+
+
+def get_health_checker(session_maker: sessionmaker[Session]) -> HealthChecker:
+    """
+    Returns the running health checker of the sessionmaker, started on first use.
+    """
+    with _health_checkers_lock:
+        if session_maker not in _health_checkers:
+            _health_checkers[session_maker] = HealthChecker(session_maker).start()
+        return _health_checkers[session_maker]
+
+
+def database_health() -> HealthStatus:
+    return get_health_checker(inject.instance(sessionmaker[Session])).status
+
+
 def is_healthy_database() -> bool:
-    session_maker = inject.instance(sessionmaker[Session])
-    try:
-        with session_maker.begin() as session:
-            return bool(session.execute(text("SELECT 1")))
-
-    except Exception as e:
-        logger.info(f"Database is not healthy: {e}")
-        return False
+    return database_health().healthy
@@ -0,0 +1,71 @@
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from gfmodules_python_shared.instrumentation import ServiceMetrics
+
+logger = logging.getLogger(__name__)
+
+BudgetAction = Literal["log", "raise"]
+
+
+class QueryBudgetExceeded(RuntimeError):
+    def __init__(self, message: str, statements: list[str]) -> None:
+        super().__init__(message)
+        self.statements = statements
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    """
+    Maximum number of statements a single service call may execute, refreshing the
+    returned value included. Going over the budget either logs a warning or raises a
+    QueryBudgetExceeded, eg: `QueryBudget(10, action="raise")` in the tests and
+    `QueryBudget(10)` in production.
+
+    The budget is checked when the service returns, thus a raised
+    QueryBudgetExceeded does not roll back the committed transaction.
+    """
+
+    max_statements: int
+    action: BudgetAction = "log"
+
+    def enforce(self, metrics: ServiceMetrics) -> None:
+        if metrics.statements <= self.max_statements:
+            return
+
+        statements = metrics.captured or []
+        message = (
+            f"Service {metrics.service} executed {metrics.statements} statements, "
+            f"over its budget of {self.max_statements}:\n"
+            + "\n".join(
+                f"{count} x {statement}"
+                for statement, count in Counter(statements).items()
+            )
+        )
+        if self.action == "raise":
+            raise QueryBudgetExceeded(message, statements)
+        logger.warning(message)
+
+
+_query_budgets: dict[Any, QueryBudget] = {}
+
+
+def register_query_budget(session_maker: Any, budget: QueryBudget) -> None:
+    """
+    Sets the default budget of the services of the (async) sessionmaker, services
+    given their own `query_budget` use that one instead.
+    """
+    _query_budgets[session_maker] = budget
+
+
+def unregister_query_budget(session_maker: Any) -> None:
+    """
+    Removes the default budget of the services of the (async) sessionmaker.
+    """
+    _query_budgets.pop(session_maker, None)
+
+
+def get_query_budget(session_maker: Any) -> QueryBudget | None:
+    return _query_budgets.get(session_maker)
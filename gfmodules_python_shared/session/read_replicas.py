@@ -0,0 +1,123 @@
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from itertools import count
+from threading import Lock
+from time import monotonic
+from typing import Any, Generic, Literal, TypeVar
+
+from .retry_policy import RetriesExhaustedError, is_transient
+
+T = TypeVar("T")
+S = TypeVar("S")
+logger = logging.getLogger(__name__)
+
+ReplicaStrategy = Literal["round_robin", "least_connections"]
+
+
+def checked_out_connections(session_maker: Any) -> int:
+    bind = session_maker.kw.get("bind")
+    pool = getattr(getattr(bind, "sync_engine", bind), "pool", None)
+    checkedout = getattr(pool, "checkedout", None)
+    return checkedout() if callable(checkedout) else 0
+
+
+class ReplicaRouter(Generic[S]):
+    """
+    Routes read only services to one of the replica sessionmakers, picked round
+    robin or by the least checked out pool connections.
+
+    A replica failing on a transient error is skipped for `cooldown` seconds and
+    the service is run again on the primary, when every replica is skipped the
+    primary serves the reads.
+    """
+
+    def __init__(
+        self,
+        primary: S,
+        replicas: Sequence[S],
+        strategy: ReplicaStrategy = "round_robin",
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self.primary = primary
+        self.replicas = tuple(replicas)
+        self.strategy = strategy
+        self.cooldown = cooldown
+        self.clock = clock
+
+        self._turns = count()
+        self._failed_until: dict[int, float] = {}
+        self._lock = Lock()
+
+    def select(self) -> S:
+        now = self.clock()
+        with self._lock:
+            available = [
+                replica
+                for index, replica in enumerate(self.replicas)
+                if self._failed_until.get(index, 0.0) <= now
+            ]
+            if not available:
+                return self.primary
+            if self.strategy == "least_connections":
+                return min(available, key=checked_out_connections)
+            return available[next(self._turns) % len(available)]
+
+    def mark_failed(self, replica: S) -> None:
+        with self._lock:
+            self._failed_until[self.replicas.index(replica)] = (
+                self.clock() + self.cooldown
+            )
+
+    def route(self, run: Callable[[S], T]) -> T:
+        replica = self.select()
+        try:
+            return run(replica)
+        except Exception as e:
+            if replica is self.primary or not self._is_failure(e):
+                raise
+            self._fall_back(replica, e)
+        return run(self.primary)
+
+    async def route_async(self, run: Callable[[S], Awaitable[T]]) -> T:
+        replica = self.select()
+        try:
+            return await run(replica)
+        except Exception as e:
+            if replica is self.primary or not self._is_failure(e):
+                raise
+            self._fall_back(replica, e)
+        return await run(self.primary)
+
+    def _is_failure(self, error: Exception) -> bool:
+        return isinstance(error, RetriesExhaustedError) or is_transient(error)
+
+    def _fall_back(self, replica: S, error: Exception) -> None:
+        logger.warning(
+            f"Replica failed due to {error.__class__.__name__}: {error}, "
+            "falling back to the primary"
+        )
+        self.mark_failed(replica)
+
+
+_replica_routers: dict[Any, ReplicaRouter[Any]] = {}
+
+
+def register_read_replicas(
+    primary: S,
+    replicas: Sequence[S],
+    strategy: ReplicaStrategy = "round_robin",
+    cooldown: float = 30.0,
+) -> ReplicaRouter[S]:
+    """
+    Routes the read only services of the primary (async) sessionmaker to the given
+    replicas, eg: `register_read_replicas(primary, [sessionmaker(replica_engine)])`
+    in the container setup.
+    """
+    router = ReplicaRouter(primary, replicas, strategy, cooldown)
+    _replica_routers[primary] = router
+    return router
+
+
+def get_replica_router(primary: S) -> ReplicaRouter[S] | None:
+    return _replica_routers.get(primary)
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import random
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from threading import Lock
+from time import monotonic, sleep
+from typing import ParamSpec, TypeVar
+
+from sqlalchemy.exc import DBAPIError, DisconnectionError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from gfmodules_python_shared.instrumentation import record_retry
+
+T = TypeVar("T")
+P = ParamSpec("P")
+logger = logging.getLogger(__name__)
+
+# serialization_failure and deadlock_detected, class 08 are connection exceptions
+TRANSIENT_SQLSTATES = frozenset({"40001", "40P01"})
+# SQLite reports a busy database as an OperationalError without sqlstate
+TRANSIENT_MESSAGES = ("database is locked",)
+
+
+class RetriesExhaustedError(RuntimeError):
+    pass
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Classifies the errors worth retrying: lost connections, pool timeouts, deadlocks,
+    serialization failures and locked SQLite databases. Everything else (eg:
+    EntryNotFound, IntegrityError, a missing table) is permanent and fails fast.
+    """
+    if isinstance(error, (DisconnectionError, PoolTimeoutError)):
+        return True
+    if isinstance(error, DBAPIError):
+        sqlstate = getattr(error.orig, "sqlstate", None) or getattr(
+            error.orig, "pgcode", None
+        )
+        return (
+            error.connection_invalidated
+            or (
+                isinstance(sqlstate, str)
+                and (sqlstate in TRANSIENT_SQLSTATES or sqlstate.startswith("08"))
+            )
+            or any(message in str(error.orig) for message in TRANSIENT_MESSAGES)
+        )
+    return False
+
+
+class RetryBudget:
+    """
+    Token bucket shared by the policies of a process, every retry withdraws a token
+    and every successful transaction deposits `token_ratio` of one. When the database
+    is down the bucket drains, and services fail fast instead of multiplying the load.
+    """
+
+    def __init__(self, max_tokens: float = 100, token_ratio: float = 0.1) -> None:
+        self.max_tokens = max_tokens
+        self.token_ratio = token_ratio
+        self.tokens = max_tokens
+        self._lock = Lock()
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.token_ratio)
+
+
+retry_budget = RetryBudget()
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    Runs a service in a transaction, retrying transient errors with exponential
+    backoff and decorrelated jitter: the next delay is drawn from
+    [base_delay, previous delay * 3], capped at max_delay.
+
+    Retries stop after `attempts`, when the next attempt would start past the
+    `deadline` (seconds since the first attempt) or when the retry budget is empty.
+    """
+
+    attempts: int = 3
+    base_delay: float = 0.1
+    max_delay: float = 1.0
+    deadline: float | None = None
+    budget: RetryBudget | None = field(default_factory=lambda: retry_budget)
+    is_transient: Callable[[BaseException], bool] = is_transient
+
+    def run(
+        self,
+        session: Session,
+        service: Callable[P, T],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        started, delay, attempt = monotonic(), self.base_delay, 0
+        while True:
+            attempt += 1
+            try:
+                with session.begin():
+                    value = service(*args, **kwargs)
+            except Exception as e:
+                if not self.is_transient(e):
+                    raise
+                delay = self._backoff(service, e, attempt, started, delay)
+                sleep(delay)
+            else:
+                self._succeeded()
+                return value
+
+    async def run_async(
+        self,
+        session: AsyncSession,
+        service: Callable[P, Awaitable[T]],
+        *args: P.args,
+        **kwargs: P.kwargs,
+    ) -> T:
+        started, delay, attempt = monotonic(), self.base_delay, 0
+        while True:
+            attempt += 1
+            try:
+                async with session.begin():
+                    value = await service(*args, **kwargs)
+            except Exception as e:
+                if not self.is_transient(e):
+                    raise
+                delay = self._backoff(service, e, attempt, started, delay)
+                await asyncio.sleep(delay)
+            else:
+                self._succeeded()
+                return value
+
+    def _backoff(
+        self,
+        service: Callable[..., object],
+        error: Exception,
+        attempt: int,
+        started: float,
+        delay: float,
+    ) -> float:
+        """
+        Returns the delay before the next attempt, raises RetriesExhaustedError
+        chained to the given error when no attempt is left.
+        """
+        delay = min(self.max_delay, random.uniform(self.base_delay, delay * 3))
+        if (
+            attempt >= self.attempts
+            or (
+                self.deadline is not None
+                and monotonic() + delay > started + self.deadline
+            )
+            or (self.budget is not None and not self.budget.withdraw())
+        ):
+            raise RetriesExhaustedError(
+                f"Transaction '{service.__name__}' failed after {attempt} retries"
+            ) from error
+
+        logger.warning(
+            f"Retrying transaction operation due to {error.__class__.__name__}: {error}"
+        )
+        logger.info(f"Retrying {service} in {delay:.3f} seconds")
+        record_retry(delay)
+        return delay
+
+    def _succeeded(self) -> None:
+        if self.budget is not None:
+            self.budget.deposit()
+
+
+# TODO: pull the policy from config
+# inject.instance(Config).database.retry_policy
+DEFAULT_RETRY_POLICY = RetryPolicy()
@@ -1,35 +1,150 @@
 import inspect
 import logging
-import random
-from collections.abc import Callable, Sequence
+from collections import defaultdict
+from collections.abc import Callable, Iterator, Sequence
 from functools import wraps
-from time import sleep
-from typing import Any, ParamSpec, TypeVar
+from time import perf_counter
+from typing import Any, ParamSpec, TypeVar, overload
 
 import inject
-from sqlalchemy.exc import DatabaseError, OperationalError
-from sqlalchemy.orm import DeclarativeBase, Session, attributes, sessionmaker
+from more_itertools import chunked
+from sqlalchemy import Select, select, text, tuple_
+from sqlalchemy.orm import DeclarativeBase, Mapper, Session, attributes, sessionmaker
+from sqlalchemy.orm.state import InstanceState
 
+from gfmodules_python_shared.instrumentation import (
+    current_metrics,
+    get_instrumentation_sink,
+    instrument_engine,
+    instrumented,
+    record_connect_wait,
+)
 from gfmodules_python_shared.repository.base import GenericRepository
 
+from .circuit_breaker import circuit
+from .query_budget import QueryBudget, get_query_budget
+from .read_replicas import get_replica_router
+from .retry_policy import DEFAULT_RETRY_POLICY, RetryPolicy
+
 T = TypeVar("T")
 P = ParamSpec("P")
 logger = logging.getLogger(__name__)
 
+SessionMaker = sessionmaker[Session]
+
+REFRESH_CHUNK_SIZE = 1_000
+READ_ONLY_TRANSACTION_DIALECTS = frozenset({"postgresql"})
+
 
 # needs changing
 def get_repository() -> Any:
     return None
 
 
-def sync_value_with_database(session: Session, value: Any) -> None:
-    if isinstance(value, DeclarativeBase) and session.identity_map.contains_state(
-        attributes.instance_state(value)
-    ):
-        session.refresh(value)
-    elif isinstance(value, Sequence):
+def _session_states(session: Session, value: Any) -> Iterator[InstanceState[Any]]:
+    if isinstance(value, DeclarativeBase):
+        state = attributes.instance_state(value)
+        if session.identity_map.contains_state(state):
+            yield state
+    elif isinstance(value, Sequence) and not isinstance(value, (str, bytes)):
         for e in value:
-            sync_value_with_database(session, e)
+            yield from _session_states(session, e)
+
+
+def refresh_statements(session: Session, value: Any) -> Iterator[Select[Any]]:
+    """
+    Generates the statements reloading the entities of the session found in value,
+    grouped per mapper: SELECT ... WHERE pk IN (...) for every chunk of entities.
+    """
+    identities: dict[Mapper[Any], dict[Any, None]] = defaultdict(dict)
+    for state in _session_states(session, value):
+        identities[state.mapper][state.identity] = None
+
+    for mapper, keys in identities.items():
+        columns = mapper.primary_key
+        for chunk in chunked(keys, REFRESH_CHUNK_SIZE):
+            yield (
+                select(mapper)
+                .where(
+                    columns[0].in_([key for (key,) in chunk])
+                    if len(columns) == 1
+                    else tuple_(*columns).in_(chunk)
+                )
+                .execution_options(populate_existing=True)
+            )
+
+
+def sync_value_with_database(session: Session, value: Any) -> None:
+    for stmt in refresh_statements(session, value):
+        session.execute(stmt).all()
+
+
+def session_options(refresh: bool, read_only: bool) -> dict[str, bool]:
+    if read_only:
+        return {"autoflush": False, "expire_on_commit": False}
+    return {} if refresh else {"expire_on_commit": False}
+
+
+def read_only_service(session: Session, service: Callable[P, T]) -> Callable[P, T]:
+    """
+    Wraps the service to run in a read only transaction, marked as such where the
+    backend supports it, eg: SET TRANSACTION READ ONLY on PostgreSQL. The session is
+    marked read only, thus the repository caches return their detached snapshots.
+    The loaded entities are expunged when the service returns, leaving nothing to
+    flush on commit.
+    """
+    read_only = session.get_bind().dialect.name in READ_ONLY_TRANSACTION_DIALECTS
+
+    @wraps(service)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        session.info["read_only"] = True
+        if read_only:
+            session.execute(text("SET TRANSACTION READ ONLY"))
+        value = service(*args, **kwargs)
+        session.expunge_all()
+        return value
+
+    return wrapper
+
+
+def measured_service(session: Session, service: Callable[P, T]) -> Callable[P, T]:
+    """
+    Wraps the service of a measured call to acquire the connection first, recording
+    the time waited on the pool. Unmeasured services are returned as is.
+    """
+    if current_metrics() is None:
+        return service
+    instrument_engine(session.get_bind())
+
+    @wraps(service)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+        started = perf_counter()
+        session.connection()
+        record_connect_wait(perf_counter() - started)
+        return service(*args, **kwargs)
+
+    return wrapper
+
+
+def service_name(service: Callable[..., Any]) -> str:
+    return f"{service.__module__}.{service.__qualname__}"
+
+
+def repository_parameters(
+    service: Callable[..., Any], base: type = GenericRepository
+) -> tuple[tuple[str, type[Any]], ...]:
+    """
+    Returns the name and type of the repository parameters that are to be injected
+    in the service, these are annotated with a subclass of the given repository base
+    and have `get_repository()` as default.
+    """
+    return tuple(
+        (parameter.name, parameter.annotation)
+        for parameter in inspect.signature(service).parameters.values()
+        if inspect.isclass(parameter.annotation)
+        and issubclass(parameter.annotation, base)
+        and parameter.default is None
+    )
 
 
 def service_transaction_retry_policy(
@@ -38,25 +153,31 @@ def service_transaction_retry_policy(
     *args: P.args,
     **kwargs: P.kwargs,
 ) -> T:
-    # TODO: pull backoffs from config
-    # inject.instance(Config).database.backoffs
-    backoffs = [0.1, 0.2, 0.4]
-    for backoff in backoffs:
-        try:
-            with session.begin():
-                return service(*args, **kwargs)
-        except (OperationalError, DatabaseError, Exception) as e:
-            logger.warning(
-                f"Retrying transaction operation due to {e.__class__.__name__}: {e}"
-            )
-        logger.info(f"Retrying {service} in {backoff} seconds")
-        sleep(backoff + random.uniform(0, 0.1))
-    raise RuntimeError(
-        f"Transaction '{service.__name__}' failed after {len(backoffs)} retries"
-    )
+    return DEFAULT_RETRY_POLICY.run(session, service, *args, **kwargs)
+
+
+@overload
+def session_manager(service: Callable[P, T]) -> Callable[P, T]: ...
 
 
-def session_manager(service: Callable[P, T]) -> Callable[P, T]:
+@overload
+def session_manager(
+    *,
+    refresh: bool = True,
+    read_only: bool = False,
+    retry_policy: RetryPolicy | None = None,
+    query_budget: QueryBudget | None = None,
+) -> Callable[[Callable[P, T]], Callable[P, T]]: ...
+
+
+def session_manager(
+    service: Callable[P, T] | None = None,
+    *,
+    refresh: bool = True,
+    read_only: bool = False,
+    retry_policy: RetryPolicy | None = None,
+    query_budget: QueryBudget | None = None,
+) -> Callable[P, T] | Callable[[Callable[P, T]], Callable[P, T]]:
     """
     This decorator requests, injects and cleans your session for the given service
     operation context.
@@ -66,24 +187,77 @@ def session_manager(service: Callable[P, T]) -> Callable[P, T]:
     parameters are instantiated with the requested session, and injected in the service
     operation signature.
 
-    Failed transaction will be retried according to the service transaction retry policy
-    If transaction is still unsuccessful after all retry, then a runtime error is raised
+    Transactions failing on a transient error are retried according to the given
+    retry policy, or the default policy. Permanent errors are raised as is, if the
+    transaction is still unsuccessful after all retries a RetriesExhaustedError is
+    raised from the last error. eg: `@session_manager(retry_policy=RetryPolicy(5))`
+
+    return value is synced with the database before sent to caller, with a single
+    query per model. When the caller only needs the values already loaded by the
+    service use `@session_manager(refresh=False)`, the session then does not expire
+    the entities on commit and nothing is reloaded.
+
+    Services decorated with `@session_manager(read_only=True)` get a session of one
+    of the read replicas registered for the sessionmaker, falling back to the
+    primary when the replica fails. Without registered replicas the primary is used.
+    Read only sessions do not autoflush, the transaction is read only and the
+    returned entities are detached with their loaded values, they are not refreshed.
+
+    When a circuit breaker is registered for the sessionmaker, calls are rejected
+    with a CircuitOpenError while the circuit is open.
+
+    When an instrumentation sink is registered for the sessionmaker, every call is
+    measured into it: duration, statements, rows, retries and connection wait.
+
+    A service executing more statements than its query budget, or else the budget
+    registered for the sessionmaker, logs or raises along with the statements:
+    eg: `@session_manager(query_budget=QueryBudget(3, action="raise"))`
 
-    return value is synced with the database before sent to caller.
+    The repository parameters are resolved once when decorating, so every call only
+    instantiates the repositories found in the service signature.
     """
 
-    @wraps(service)
-    def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
-        with inject.instance(sessionmaker[Session])() as session:
-            kwargs |= {  # type: ignore
-                parameter.name: parameter.annotation(session)
-                for parameter in inspect.signature(service).parameters.values()
-                if inspect.isclass(parameter.annotation)
-                and issubclass(parameter.annotation, GenericRepository)
-                and parameter.default is None
-            }
-            value = service_transaction_retry_policy(session, service, *args, **kwargs)
-            sync_value_with_database(session, value)
-        return value
+    def decorator(service: Callable[P, T]) -> Callable[P, T]:
+        repositories = repository_parameters(service)
+        options = session_options(refresh, read_only)
+        qualified_name = service_name(service)
 
-    return wrapper
+        @wraps(service)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            def run(session_maker: SessionMaker) -> T:
+                with circuit(session_maker), session_maker(**options) as session:
+                    for name, repository in repositories:
+                        kwargs[name] = repository(session)
+                    value = (retry_policy or DEFAULT_RETRY_POLICY).run(
+                        session,
+                        measured_service(
+                            session,
+                            read_only_service(session, service)
+                            if read_only
+                            else service,
+                        ),
+                        *args,
+                        **kwargs,
+                    )
+                    if refresh and not read_only:
+                        sync_value_with_database(session, value)
+                return value
+
+            session_maker = inject.instance(SessionMaker)
+            budget = query_budget or get_query_budget(session_maker)
+            with instrumented(
+                qualified_name,
+                get_instrumentation_sink(session_maker),
+                capture=budget is not None,
+            ) as metrics:
+                if read_only and (router := get_replica_router(session_maker)):
+                    value = router.route(run)
+                else:
+                    value = run(session_maker)
+                if budget is not None and metrics is not None:
+                    budget.enforce(metrics)
+                return value
+
+        return wrapper
+
+    return decorator if service is None else decorator(service)
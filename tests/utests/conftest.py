@@ -1,12 +1,17 @@
-from collections.abc import Callable, Iterable, Iterator
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from typing import Any, TypeAlias
 
 import inject
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import StaticPool, create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from gfmodules_python_shared.schema.sql_model import SQLModelBase, TSQLModel
 
+AsyncTest: TypeAlias = Callable[[async_sessionmaker[AsyncSession]], Awaitable[None]]
+
 
 @pytest.fixture(scope="module", autouse=True)
 def with_container() -> None:
@@ -29,6 +34,22 @@ def session(session_maker: sessionmaker[Session]) -> Iterator[Session]:
         yield session
 
 
+@pytest.fixture
+def statements(session_maker: sessionmaker[Session]) -> Iterator[list[str]]:
+    """
+    Collects the SQL statements executed on the database during the test.
+    """
+    executed: list[str] = []
+
+    def before_cursor_execute(*args: Any) -> None:
+        executed.append(args[2])
+
+    engine = session_maker.kw["bind"]
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
 @pytest.fixture(scope="module")
 def insert_entities() -> Callable[[Session, Iterable[SQLModelBase]], None]:
     def inserter(
@@ -39,3 +60,28 @@ def insert_entities() -> Callable[[Session, Iterable[SQLModelBase]], None]:
             session.bulk_save_objects(entities)
 
     return inserter
+
+
+@pytest.fixture
+def run_async(session_maker: sessionmaker[Session]) -> Callable[[AsyncTest], None]:
+    """
+    Runs the given coroutine function in a new event loop, with an async_sessionmaker
+    bound to a fresh in-memory database, and bound to the container.
+    """
+
+    async def runner(test: AsyncTest) -> None:
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as connection:
+            await connection.run_sync(SQLModelBase.metadata.create_all)
+
+        def container(binder: inject.Binder) -> None:
+            binder.bind(sessionmaker[Session], session_maker)
+            binder.bind(async_sessionmaker[AsyncSession], async_sessionmaker(engine))
+
+        inject.configure(container, clear=True)
+        try:
+            await test(inject.instance(async_sessionmaker[AsyncSession]))
+        finally:
+            await engine.dispose()
+
+    return lambda test: asyncio.run(runner(test))
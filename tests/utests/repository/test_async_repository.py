@@ -0,0 +1,134 @@
+from collections.abc import Callable
+from datetime import datetime
+from uuid import UUID
+
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.model import Person
+from app.repository import AsyncPersonRepository
+from gfmodules_python_shared.repository.cache import EntityCache, QueryCache
+from gfmodules_python_shared.repository.exceptions import EntryNotFound
+from tests.utests.conftest import AsyncTest
+
+NAMES = ("John Snow", "John Hill", "John Stone", "John Storm")
+
+
+async def populate(session_maker: async_sessionmaker[AsyncSession]) -> None:
+    async with session_maker.begin() as session:
+        session.add_all(
+            Person(name=name, created_at=datetime(2020 + i, 1, 1))
+            for i, name in enumerate(NAMES)
+        )
+
+
+def test_get_and_count(run_async: Callable[[AsyncTest], None]) -> None:
+    async def test(session_maker: async_sessionmaker[AsyncSession]) -> None:
+        await populate(session_maker)
+        async with session_maker() as session:
+            repository = AsyncPersonRepository(session)
+
+            assert await repository.count() == len(NAMES)
+            assert await repository.count(name="John Hill") == 1
+            assert (await repository.get_or_fail(name="John Hill")).name == "John Hill"
+            assert await repository.get(name="no match") is None
+            with pytest.raises(EntryNotFound, match="No result found in Person"):
+                await repository.get_or_fail(name="no match")
+            with pytest.raises(InvalidRequestError, match="bad is not a column"):
+                await repository.get(bad="value")
+
+    run_async(test)
+
+
+def test_get_many(run_async: Callable[[AsyncTest], None]) -> None:
+    async def test(session_maker: async_sessionmaker[AsyncSession]) -> None:
+        await populate(session_maker)
+        async with session_maker() as session:
+            repository = AsyncPersonRepository(session)
+
+            assert [p.name for p in await repository.get_many()] == list(NAMES)
+            page = await repository.get_many(limit=2, offset=1)
+            assert [p.name for p in page] == list(NAMES[1:3])
+            after = await repository.get_many(cursor=repository.cursor_of(page[0]))
+            assert [p.name for p in after] == list(NAMES[2:])
+            rows = await repository.get_many_columns(("name",), limit=2, offset=1)
+            assert [row.name for row in rows] == list(NAMES[1:3])
+
+    run_async(test)
+
+
+class JoinedAsyncPersonRepository(AsyncPersonRepository):
+    property_lookup_join_threshold = 1
+
+
+@pytest.mark.parametrize(
+    "repository_class", (AsyncPersonRepository, JoinedAsyncPersonRepository)
+)
+def test_get_by_property(
+    run_async: Callable[[AsyncTest], None],
+    repository_class: type[AsyncPersonRepository],
+) -> None:
+    async def test(session_maker: async_sessionmaker[AsyncSession]) -> None:
+        await populate(session_maker)
+        async with session_maker() as session:
+            repository = repository_class(session)
+            values = ["John Snow", "John Storm", "no match"]
+
+            entities = await repository.get_by_property("name", [*values, None])
+            assert sorted(p.name for p in entities) == ["John Snow", "John Storm"]
+            assert await repository.get_missing_by_property("name", values) == {
+                "no match"
+            }
+            with pytest.raises(EntryNotFound, match="for no match"):
+                await repository.get_by_property_exact("name", values)
+
+    run_async(test)
+
+
+def test_create_and_delete(run_async: Callable[[AsyncTest], None]) -> None:
+    async def test(session_maker: async_sessionmaker[AsyncSession]) -> None:
+        person_id = UUID("a9c4e465-a01f-4d78-952f-d42c4b03ced7")
+        async with session_maker.begin() as session:
+            AsyncPersonRepository(session).create(Person(id=person_id, name="new"))
+
+        async with session_maker.begin() as session:
+            repository = AsyncPersonRepository(session)
+            await repository.delete(await repository.get_or_fail(id=person_id))
+
+        async with session_maker() as session:
+            assert await AsyncPersonRepository(session).get(id=person_id) is None
+
+    run_async(test)
+
+
+class CachedAsyncPersonRepository(AsyncPersonRepository):
+    entity_cache = EntityCache()
+    query_cache = QueryCache()
+
+
+def test_caches(run_async: Callable[[AsyncTest], None]) -> None:
+    cache = CachedAsyncPersonRepository.query_cache
+
+    async def test(session_maker: async_sessionmaker[AsyncSession]) -> None:
+        await populate(session_maker)
+        async with session_maker.begin() as session:
+            repository = CachedAsyncPersonRepository(session)
+            assert await repository.count() == await repository.count() == len(NAMES)
+            people = await repository.get_many(name="John Hill")
+            assert await repository.get_many(name="John Hill") == people
+            assert (cache.hits, cache.misses) == (2, 2)
+
+        async with session_maker.begin() as session:
+            repository = CachedAsyncPersonRepository(session)
+            repository.create(Person(name="John Cached"))
+            assert await repository.count() == len(NAMES) + 1
+            await repository.delete(await repository.get_or_fail(name="John Hill"))
+            assert await repository.get_many(name="John Hill") == []
+
+        async with session_maker() as session:
+            repository = CachedAsyncPersonRepository(session)
+            assert await repository.count() == len(NAMES)
+            assert await repository.get_many(name="John Hill") == []
+
+    run_async(test)
@@ -0,0 +1,212 @@
+from unittest.mock import MagicMock
+from uuid import UUID
+
+import pytest
+from sqlalchemy import Select, bindparam, inspect, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.model import Person
+from app.repository import PersonRepository
+from gfmodules_python_shared.repository.cache import (
+    EntityCache,
+    LRUCache,
+    QueryCache,
+)
+
+ID = UUID("5e34ed9c-1f3a-4f2d-8c0b-3b0e3a5c7d11")
+
+
+class CachedPersonRepository(PersonRepository):
+    entity_cache = EntityCache()
+    query_cache = QueryCache()
+
+
+@pytest.fixture(autouse=True)
+def person(session_maker: sessionmaker[Session]) -> None:
+    CachedPersonRepository.entity_cache.invalidate()
+    CachedPersonRepository.query_cache.invalidate()
+    with session_maker.begin() as session:
+        session.merge(Person(id=ID, name="Cached", age=42))
+
+
+def test_get_should_return_cached_detached_snapshots(
+    session: Session, statements: list[str]
+) -> None:
+    session.info["read_only"] = True
+    repository = CachedPersonRepository(session)
+
+    repository.get_or_fail(id=ID)
+    first = repository.get_or_fail(id=ID)
+    second = repository.get_or_fail(id=str(ID))
+
+    assert len(statements) == 1
+    assert first is not second
+    assert inspect(first).detached and inspect(second).detached
+    assert (second.id, second.name, second.age) == (ID, "Cached", 42)
+
+
+def test_caches_should_merge_cached_entities_into_write_sessions(
+    session_maker: sessionmaker[Session], statements: list[str]
+) -> None:
+    with session_maker() as session:
+        CachedPersonRepository(session).get_or_fail(id=ID)
+        CachedPersonRepository(session).get_many(name="Cached")
+
+    with session_maker.begin() as session:
+        repository = CachedPersonRepository(session)
+        person = repository.get_or_fail(id=ID)
+        assert inspect(person).persistent
+        assert repository.get_many(name="Cached") == [person]
+        person.age = 43
+    assert len(statements) == 3
+
+    with session_maker() as session:
+        assert session.get_one(Person, ID).age == 43
+
+
+def test_get_should_not_cache_uncommitted_changes(
+    session_maker: sessionmaker[Session],
+) -> None:
+    with session_maker() as session:
+        session.get_one(Person, ID).age = 99
+        assert CachedPersonRepository(session).get_or_fail(id=ID).age == 99
+
+    with session_maker() as session:
+        assert CachedPersonRepository(session).get_or_fail(id=ID).age == 42
+
+
+def test_get_should_not_cache_other_lookups(
+    session: Session, statements: list[str]
+) -> None:
+    repository = CachedPersonRepository(session)
+
+    repository.get_or_fail(name="Cached")
+    person = repository.get_or_fail(name="Cached")
+
+    assert len(statements) == 2
+    assert inspect(person).persistent
+
+
+def test_commit_should_invalidate_caches(
+    session_maker: sessionmaker[Session], statements: list[str]
+) -> None:
+    with session_maker() as session:
+        assert CachedPersonRepository(session).get_or_fail(id=ID).age == 42
+
+    with session_maker.begin() as session:
+        session.get_one(Person, ID).age = 43
+
+    with session_maker() as session:
+        assert CachedPersonRepository(session).get_or_fail(id=ID).age == 43
+
+
+def test_bulk_update_should_invalidate_caches(session: Session) -> None:
+    repository = CachedPersonRepository(session)
+    repository.get_or_fail(id=ID)
+
+    repository.update_where({"age": 44}, id=ID)
+
+    assert repository.get_or_fail(id=ID).age == 44
+    session.rollback()
+
+
+def test_delete_should_invalidate_caches(session: Session) -> None:
+    repository = CachedPersonRepository(session)
+
+    repository.delete(repository.get_or_fail(name="Cached"))
+    session.flush()
+
+    assert repository.get(id=ID) is None
+    session.rollback()
+
+
+def test_get_many_and_count_should_serve_cached_results(
+    session: Session, statements: list[str]
+) -> None:
+    session.info["read_only"] = True
+    repository = CachedPersonRepository(session)
+    cache = CachedPersonRepository.query_cache
+    hits, misses = cache.hits, cache.misses
+
+    people = repository.get_many(limit=10, name="Cached")
+    cached = repository.get_many(limit=10, name="Cached")
+    assert repository.count(name="Cached") == repository.count(name="Cached") == 1
+
+    assert len(statements) == 2
+    assert (cache.hits - hits, cache.misses - misses) == (2, 2)
+    assert [p.id for p in people] == [p.id for p in cached] == [ID]
+    assert inspect(cached[0]).detached
+
+    repository.get_many(limit=5, name="Cached")
+    repository.count(name="Other")
+    assert len(statements) == 4
+
+
+def test_query_cache_key_should_not_compile_the_statement(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(Select, "compile", MagicMock(side_effect=AssertionError))
+    cache = CachedPersonRepository.query_cache
+
+    by_name = select(Person).where(Person.name == bindparam("name"))
+    assert cache.key(by_name, {"name": "a"}) == cache.key(by_name, {"name": "a"})
+    assert cache.key(by_name, {"name": "a"}) != cache.key(by_name, {"name": "b"})
+    assert cache.key(select(Person).where(Person.age == 1)) != cache.key(
+        select(Person).where(Person.age == 2)
+    )
+    assert hash(cache.key(by_name, {"name": {"b": "2", "a": "1"}})) == hash(
+        cache.key(by_name, {"name": {"a": "1", "b": "2"}})
+    )
+
+
+def test_get_many_and_count_should_not_cache_uncommitted_changes(
+    session_maker: sessionmaker[Session],
+) -> None:
+    with session_maker() as session:
+        repository = CachedPersonRepository(session)
+        session.get_one(Person, ID).age = 77
+        assert [p.age for p in repository.get_many(name="Cached")] == [77]
+        assert repository.count(age=77) == 1
+
+    with session_maker() as session:
+        repository = CachedPersonRepository(session)
+        assert [p.age for p in repository.get_many(name="Cached")] == [42]
+        assert repository.count(age=77) == 0
+
+
+def test_writes_should_invalidate_query_cache(
+    session_maker: sessionmaker[Session],
+) -> None:
+    with session_maker() as session:
+        repository = CachedPersonRepository(session)
+        assert repository.count() == 1
+
+        repository.create(Person(name="New"))
+        session.flush()
+        assert repository.count() == 2
+        session.rollback()
+        assert repository.count() == 1
+
+    with session_maker.begin() as session:
+        session.add(Person(name="Committed"))
+
+    with session_maker.begin() as session:
+        repository = CachedPersonRepository(session)
+        assert repository.count() == 2
+        repository.delete_where(name="Committed")
+        assert repository.count() == 1
+
+
+def test_lru_cache_should_evict_least_recently_used_and_expired_entries() -> None:
+    now = 0.0
+    cache: LRUCache[str, int] = LRUCache(maxsize=2, ttl=10, clock=lambda: now)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+    now = 11
+    assert cache.get("a") is None and len(cache) == 1
+    assert (cache.hits, cache.misses) == (3, 2)
@@ -0,0 +1,180 @@
+from collections.abc import Callable
+from typing import Any
+from uuid import UUID, uuid4
+
+import pytest
+from sqlalchemy import ColumnExpressionArgument, ForeignKey
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship, sessionmaker
+
+from gfmodules_python_shared.repository.async_base import AsyncRepositoryBase
+from gfmodules_python_shared.repository.base import RepositoryBase
+from gfmodules_python_shared.schema.pagination.pagination_query_params_schema import (
+    PaginationQueryParams,
+)
+from gfmodules_python_shared.schema.sql_model import SQLModelBase
+from tests.utests.conftest import AsyncTest
+
+
+class Review(SQLModelBase):
+    __tablename__ = "reviews"
+
+    id: Mapped[UUID] = mapped_column("id", primary_key=True, default=uuid4)
+    stars: Mapped[int] = mapped_column("stars")
+    book_id: Mapped[UUID] = mapped_column(ForeignKey("books.id"))
+
+
+class Book(SQLModelBase):
+    __tablename__ = "books"
+
+    id: Mapped[UUID] = mapped_column("id", primary_key=True, default=uuid4)
+    title: Mapped[str] = mapped_column("title")
+    author_id: Mapped[UUID] = mapped_column(ForeignKey("authors.id"))
+    reviews: Mapped[list[Review]] = relationship()
+
+
+class Author(SQLModelBase):
+    __tablename__ = "authors"
+
+    id: Mapped[UUID] = mapped_column("id", primary_key=True, default=uuid4)
+    name: Mapped[str] = mapped_column("name")
+    books: Mapped[list[Book]] = relationship()
+
+
+class AuthorRepository(RepositoryBase[Author]):
+    @property
+    def order_by(self) -> tuple[ColumnExpressionArgument[Any] | str, ...]:
+        return (Author.name,)
+
+
+class LoadingAuthorRepository(AuthorRepository):
+    load = {"books": "selectin"}
+
+
+class AsyncAuthorRepository(AsyncRepositoryBase[Author]):
+    @property
+    def order_by(self) -> tuple[ColumnExpressionArgument[Any] | str, ...]:
+        return (Author.name,)
+
+
+def authors() -> list[Author]:
+    return [
+        Author(
+            name=name,
+            books=[
+                Book(title=f"{name} {i}", reviews=[Review(stars=i)]) for i in range(3)
+            ],
+        )
+        for name in ("Austen", "Brontë", "Christie")
+    ]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def library(session_maker: sessionmaker[Session]) -> None:
+    with session_maker() as session, session.begin():
+        session.add_all(authors())
+
+
+def test_lazy_loading_relationships_queries_per_entity(
+    session: Session, statements: list[str]
+) -> None:
+    for author in AuthorRepository(session).get_many():
+        assert len(author.books) == 3
+
+    assert len(statements) == 4
+
+
+@pytest.mark.parametrize("strategy", ["selectin", "joined", "subquery"])
+def test_eager_loading_relationships_queries_once(
+    session: Session, statements: list[str], strategy: Any
+) -> None:
+    found = AuthorRepository(session).get_many(
+        load={"books": strategy, "books.reviews": strategy}
+    )
+
+    assert len(statements) == (1 if strategy == "joined" else 3)
+    assert [author.name for author in found] == ["Austen", "Brontë", "Christie"]
+    assert all(len(book.reviews) == 1 for author in found for book in author.books)
+    assert len(statements) == (1 if strategy == "joined" else 3)
+
+
+def test_get_loads_relationships(session: Session, statements: list[str]) -> None:
+    author = AuthorRepository(session).get_or_fail(
+        name="Brontë", load={"books": "joined"}
+    )
+
+    assert sorted(book.title for book in author.books) == [
+        "Brontë 0",
+        "Brontë 1",
+        "Brontë 2",
+    ]
+    assert len(statements) == 1
+
+
+def test_raise_loading_forbids_lazy_loads(session: Session) -> None:
+    (author, *_) = AuthorRepository(session).get_many(load={"books": "raise"})
+
+    with pytest.raises(InvalidRequestError):
+        _ = author.books
+
+
+def test_repository_load_is_overridden_per_call(
+    session: Session, statements: list[str]
+) -> None:
+    repository = LoadingAuthorRepository(session)
+    (author,) = repository.get_by_property("name", ["Christie"])
+    assert len(author.books) == 3
+    assert len(statements) == 2
+
+    session.expunge_all()
+    (author,) = repository.get_by_property("name", ["Christie"], {"books": "noload"})
+    assert author.books == []
+
+
+def test_get_page_with_joined_loading_counts_entities(session: Session) -> None:
+    page = AuthorRepository(session).get_page(
+        PaginationQueryParams(limit=2), load={"books": "joined"}
+    )
+
+    assert [author.name for author in page.items] == ["Austen", "Brontë"]
+    assert page.total == 3
+    assert page.has_next
+
+
+def test_iter_batches_loads_relationships_per_batch(
+    session: Session, statements: list[str]
+) -> None:
+    batches = AuthorRepository(session).iter_batches(
+        batch_size=2, load={"books": "selectin"}
+    )
+
+    assert [[len(author.books) for author in batch] for batch in batches] == [
+        [3, 3],
+        [3],
+    ]
+    assert len(statements) == 3
+
+
+def test_unknown_relationship_is_rejected(session: Session) -> None:
+    with pytest.raises(AttributeError, match="title is not a relationship in the Book"):
+        AuthorRepository(session).get_many(load={"books.title": "selectin"})
+
+
+def test_async_repository_loads_relationships(
+    run_async: Callable[[AsyncTest], None],
+) -> None:
+    async def test(session_maker: async_sessionmaker[AsyncSession]) -> None:
+        async with session_maker.begin() as session:
+            session.add_all(authors())
+        async with session_maker() as session:
+            repository = AsyncAuthorRepository(session)
+            found = await repository.get_many(load={"books": "joined"})
+            author = await repository.get_or_fail(
+                name="Austen", load={"books": "selectin"}
+            )
+
+            assert [len(author.books) for author in found] == [3, 3, 3]
+            assert len(author.books) == 3
+
+    run_async(test)
@@ -1,17 +1,23 @@
 from collections.abc import Callable, Iterable
 from datetime import datetime
 from typing import Any, TypeAlias
+from unittest.mock import MagicMock
 from uuid import UUID
 
 import pytest
-from sqlalchemy import ColumnExpressionArgument
-from sqlalchemy.exc import InvalidRequestError
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import ColumnExpressionArgument, Table, func, text
+from sqlalchemy.exc import InternalError, InvalidRequestError, OperationalError
+from sqlalchemy.orm import Mapped, Session, mapped_column, sessionmaker
 
 from app.model import Person
 from app.repository import PersonRepository
-from gfmodules_python_shared.repository.exceptions import EntryNotFound
-from gfmodules_python_shared.schema.sql_model import TSQLModel
+from gfmodules_python_shared.repository.base import RepositoryBase
+from gfmodules_python_shared.repository.exceptions import EntryNotFound, InvalidCursor
+from gfmodules_python_shared.repository.keyset import encode_cursor
+from gfmodules_python_shared.schema.pagination.pagination_query_params_schema import (
+    PaginationQueryParams,
+)
+from gfmodules_python_shared.schema.sql_model import SQLModelBase, TSQLModel
 from tests.utests.utils import are_the_same_entity
 
 Inserter: TypeAlias = Callable[[Session, Iterable[TSQLModel]], None]
@@ -179,6 +185,74 @@ def test_get_by_priority(
     )
 
 
+class ChunkedPersonRepository(PersonRepository):
+    property_lookup_chunk_size = 2
+
+
+class JoinedPersonRepository(PersonRepository):
+    property_lookup_join_threshold = 2
+
+
+@pytest.mark.parametrize(
+    "repository_class",
+    (
+        pytest.param(PersonRepository, id="single IN"),
+        pytest.param(ChunkedPersonRepository, id="chunked IN"),
+        pytest.param(JoinedPersonRepository, id="temporary table join"),
+    ),
+)
+@pytest.mark.parametrize(
+    "attribute, values",
+    (
+        pytest.param(
+            "name",
+            ["John Snow", "John Sand", "no match", "John Snow", "John Pyke"],
+            id="string column",
+        ),
+        pytest.param(
+            "id",
+            [
+                UUID("caad98ff-53f6-4451-9d74-1520f7c5dbe5"),
+                UUID("4869daa2-c226-4ab8-950f-605e2342e32c"),
+                UUID("a9c4e465-a01f-4d78-952f-d42c4b03ced7"),
+            ],
+            id="uuid column",
+        ),
+        pytest.param("name", [], id="no values"),
+    ),
+)
+def test_get_by_property_should_give_the_same_entities_for_every_strategy(
+    session: Session,
+    people: dict[str, Person],
+    repository_class: type[PersonRepository],
+    attribute: str,
+    values: list[Any],
+) -> None:
+    actual = repository_class(session).get_by_property(attribute, values)
+
+    assert isinstance(actual, list)
+    assert sorted(person.id for person in actual) == sorted(
+        person.id for person in people.values() if getattr(person, attribute) in values
+    )
+
+
+def test_get_by_property_should_raise_the_error_of_a_failed_lookup(
+    session: Session, people: dict[str, Person], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    error = OperationalError(None, None, Exception("lookup failed"))
+    monkeypatch.setattr(
+        JoinedPersonRepository, "_scalars_all", MagicMock(side_effect=error)
+    )
+    drop = MagicMock(side_effect=InternalError(None, None, Exception("aborted")))
+    monkeypatch.setattr(Table, "drop", drop)
+
+    with pytest.raises(OperationalError) as exc_info:
+        JoinedPersonRepository(session).get_by_property("name", list(people))
+
+    assert exc_info.value is error
+    drop.assert_not_called()
+
+
 @pytest.mark.parametrize(
     "kargs, house_names",
     (
@@ -250,6 +324,305 @@ def test_get_many(
     )
 
 
+@pytest.mark.parametrize(
+    "order_by",
+    (
+        pytest.param(None, id="default order"),
+        pytest.param((Person.age.desc(),), id="mixed directions"),
+        pytest.param(("name",), id="order by attribute name"),
+    ),
+)
+def test_get_many_by_cursor_should_walk_all_entities_in_order(
+    session: Session,
+    people: dict[str, Person],
+    order_by: tuple[ColumnExpressionArgument[Any] | str, ...] | None,
+) -> None:
+    repository = PersonRepository(session)
+    expected = repository.get_many(order_by=order_by)
+
+    actual: list[Person] = []
+    cursor = None
+    while page := repository.get_many(limit=3, cursor=cursor, order_by=order_by):
+        actual.extend(page)
+        cursor = repository.cursor_of(page[-1], order_by=order_by)
+
+    assert len(actual) == len(people)
+    assert [person.id for person in actual] == [person.id for person in expected]
+
+
+class Pet(SQLModelBase):
+    __tablename__ = "pets"
+
+    id: Mapped[int] = mapped_column("id", primary_key=True)
+    nickname: Mapped[str | None] = mapped_column("nickname", nullable=True)
+
+
+class PetRepository(RepositoryBase[Pet]):
+    @property
+    def order_by(self) -> tuple[ColumnExpressionArgument[Any] | str, ...]:
+        return ()
+
+
+@pytest.mark.parametrize(
+    "order_by, expected",
+    (
+        pytest.param(("nickname",), [2, 4, 3, 1, 5], id="ascending"),
+        pytest.param((Pet.nickname.desc(),), [3, 4, 2, 1, 5], id="descending"),
+    ),
+)
+def test_get_many_by_cursor_should_walk_nullable_columns(
+    session: Session,
+    order_by: tuple[ColumnExpressionArgument[Any] | str, ...],
+    expected: list[int],
+) -> None:
+    session.add_all(
+        Pet(id=id, nickname=nickname)
+        for id, nickname in enumerate((None, "Bella", "Max", "Luna", None), start=1)
+    )
+    repository = PetRepository(session)
+
+    actual: list[Pet] = []
+    cursor = None
+    while page := repository.get_many(limit=2, cursor=cursor, order_by=order_by):
+        actual.extend(page)
+        cursor = repository.cursor_of(page[-1], order_by=order_by)
+
+    assert [pet.id for pet in actual] == expected
+    session.rollback()
+
+
+@pytest.mark.parametrize("join_threshold", (10, 1), ids=("IN", "temporary table join"))
+def test_get_by_property_should_match_null_values_given_none(
+    session: Session, monkeypatch: pytest.MonkeyPatch, join_threshold: int
+) -> None:
+    monkeypatch.setattr(PetRepository, "property_lookup_join_threshold", join_threshold)
+    session.add_all(
+        Pet(id=id, nickname=nickname)
+        for id, nickname in enumerate((None, "Bella", "Max"), start=1)
+    )
+    repository = PetRepository(session)
+
+    pets = repository.get_by_property("nickname", ["Bella", None, "Rex", None])
+
+    assert sorted(pet.id for pet in pets) == [1, 2]
+    assert repository.get_missing_by_property("nickname", [None, "Rex"]) == {"Rex"}
+    session.rollback()
+
+
+def test_filters_on_none_should_match_null_values(session: Session) -> None:
+    session.add_all((Pet(id=1, nickname=None), Pet(id=2, nickname="Bella")))
+    repository = PetRepository(session)
+
+    assert repository.get_or_fail(nickname=None).id == 1
+    assert [pet.id for pet in repository.get_many(nickname=None)] == [1]
+    assert repository.count(nickname=None) == 1
+    assert repository.get_or_fail(nickname="Bella").id == 2
+    assert repository._get_statement(nickname=None) is not repository._get_statement(
+        nickname="Bella"
+    )
+    session.rollback()
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    (
+        pytest.param({}, id="all entities"),
+        pytest.param({"order_by": (Person.age.desc(),)}, id="ordered"),
+        pytest.param({"limit": 5, "offset": 2}, id="paged"),
+        pytest.param({"name": "John Pyke"}, id="filtered"),
+    ),
+)
+def test_stream_should_yield_the_entities_of_get_many(
+    session: Session, people: dict[str, Person], kwargs: dict[str, Any]
+) -> None:
+    repository = PersonRepository(session)
+
+    assert [p.id for p in repository.stream(batch_size=3, **kwargs)] == [
+        p.id for p in repository.get_many(**kwargs)
+    ]
+
+
+def test_iter_batches_should_yield_batches_of_batch_size(
+    session: Session, people: dict[str, Person]
+) -> None:
+    batches = list(PersonRepository(session).iter_batches(batch_size=3))
+
+    assert [len(batch) for batch in batches] == [3, 3, 2]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    (
+        pytest.param({}, id="all entities"),
+        pytest.param({"order_by": (Person.age.desc(),)}, id="ordered"),
+        pytest.param({"limit": 3, "offset": 2}, id="paged"),
+        pytest.param({"age": 35}, id="filtered"),
+    ),
+)
+def test_get_many_columns_should_return_rows_of_get_many(
+    session: Session, people: dict[str, Person], kwargs: dict[str, Any]
+) -> None:
+    repository = PersonRepository(session)
+
+    rows = repository.get_many_columns(("id", "name"), **kwargs)
+
+    assert [row._asdict() for row in rows] == [
+        {"id": person.id, "name": person.name}
+        for person in repository.get_many(**kwargs)
+    ]
+
+
+def test_get_many_columns_should_not_load_entities(
+    session: Session, people: dict[str, Person]
+) -> None:
+    rows = PersonRepository(session).get_many_columns(("name",), limit=2)
+
+    assert [row.name for row in rows] == ["John Waters", "John Pyke"]
+    assert not session.identity_map
+
+
+def test_get_many_should_load_only_the_given_columns(
+    session: Session, people: dict[str, Person], statements: list[str]
+) -> None:
+    (person,) = PersonRepository(session).get_many(columns=("name",), limit=1)
+
+    assert "persons.age" not in statements[0]
+    assert person.name == "John Waters" and len(statements) == 1
+    assert person.age == 95 and len(statements) == 2
+
+
+@pytest.mark.parametrize(
+    "columns, error",
+    (
+        pytest.param((), ValueError, id="no columns"),
+        pytest.param(("name", "house"), InvalidRequestError, id="bad column"),
+    ),
+)
+def test_get_many_columns_should_raise_given_bad_columns(
+    session: Session, columns: tuple[str, ...], error: type[Exception]
+) -> None:
+    with pytest.raises(error):
+        PersonRepository(session).get_many_columns(columns)
+
+
+def test_get_page_should_fetch_items_and_total_in_one_statement(
+    session: Session, people: dict[str, Person], statements: list[str]
+) -> None:
+    repository = PersonRepository(session)
+    page = repository.get_page(PaginationQueryParams(limit=3, offset=3))
+
+    assert len(statements) == 1
+    assert [p.id for p in page.items] == [
+        p.id for p in repository.get_many(limit=3, offset=3)
+    ]
+    assert (page.limit, page.offset, page.total, page.has_next) == (3, 3, 8, True)
+    assert page.next_cursor == repository.cursor_of(page.items[-1])
+
+
+def test_get_page_should_walk_all_pages_by_cursor(
+    session: Session, people: dict[str, Person], statements: list[str]
+) -> None:
+    repository = PersonRepository(session)
+    params = PaginationQueryParams(limit=3)
+    pages = [repository.get_page(params)]
+    while pages[-1].next_cursor:
+        params.cursor = pages[-1].next_cursor
+        pages.append(repository.get_page(params))
+
+    assert len(statements) == len(pages) == 3
+    assert [page.total for page in pages] == [8, 8, 8]
+    assert [page.has_next for page in pages] == [True, True, False]
+    assert [p.id for page in pages for p in page.items] == [
+        p.id for p in repository.get_many()
+    ]
+
+
+def test_get_page_should_leave_out_total_given_with_total_false(
+    session: Session, people: dict[str, Person]
+) -> None:
+    repository = PersonRepository(session)
+    last = repository.get_page(
+        PaginationQueryParams(limit=3, offset=6), with_total=False
+    )
+    filtered = repository.get_page(PaginationQueryParams(), name="John Sand")
+
+    assert (len(last.items), last.total, last.has_next, last.next_cursor) == (
+        2,
+        None,
+        False,
+        None,
+    )
+    assert (len(filtered.items), filtered.total, filtered.has_next) == (1, 1, False)
+
+
+def test_get_page_should_count_given_offset_past_the_last_entity(
+    session: Session, people: dict[str, Person]
+) -> None:
+    page = PersonRepository(session).get_page(PaginationQueryParams(offset=20))
+
+    assert (page.items, page.total, page.has_next) == ([], 8, False)
+
+
+def test_get_many_by_cursor_should_match_offset_page(
+    session: Session, people: dict[str, Person]
+) -> None:
+    repository = PersonRepository(session)
+    first, *_ = repository.get_many(limit=3)
+
+    assert [p.id for p in repository.get_many(cursor=repository.cursor_of(first))] == [
+        p.id for p in repository.get_many(offset=1)
+    ]
+
+
+@pytest.mark.parametrize(
+    "order_by",
+    (
+        pytest.param((func.lower(Person.name),), id="function"),
+        pytest.param((Person.age + 1,), id="expression"),
+        pytest.param((text("name"),), id="text"),
+        pytest.param((Person.name.desc().nulls_last(),), id="nulls last"),
+    ),
+)
+def test_get_many_by_offset_should_accept_any_order(
+    session: Session,
+    people: dict[str, Person],
+    order_by: tuple[ColumnExpressionArgument[Any], ...],
+) -> None:
+    repository = PersonRepository(session)
+
+    assert len(repository.get_many(order_by=order_by)) == len(people)
+    assert len(repository.get_many(limit=2, offset=2, order_by=order_by)) == 2
+    page = repository.get_page(PaginationQueryParams(limit=2), order_by=order_by)
+    assert page.has_next and page.next_cursor is None
+    with pytest.raises(ValueError, match="is not a column in the Person"):
+        repository.get_many(cursor=encode_cursor([1, 2, 3]), order_by=order_by)
+
+
+def test_get_many_should_raise_value_error_given_offset_and_cursor(
+    session: Session,
+) -> None:
+    with pytest.raises(ValueError, match="Either offset or cursor not both"):
+        PersonRepository(session).get_many(offset=1, cursor="WzFd")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    (
+        pytest.param("not a cursor!", id="malformed"),
+        pytest.param("eyJhIjogMX0=", id="not a list"),
+        pytest.param("WzFd", id="wrong number of values"),
+        pytest.param(encode_cursor([{"decimal": "x"}]), id="bad decimal"),
+        pytest.param(encode_cursor([{"uuid": 1}]), id="uuid not a string"),
+        pytest.param(encode_cursor([{"datetime": "never"}]), id="bad datetime"),
+    ),
+)
+def test_get_many_should_raise_invalid_cursor_given_a_bad_cursor(
+    session: Session, cursor: str
+) -> None:
+    with pytest.raises(InvalidCursor):
+        PersonRepository(session).get_many(cursor=cursor)
+
+
 @pytest.mark.parametrize(
     "args, house_names",
     (
@@ -300,10 +673,38 @@ def test_get_by_priority_exact(
 def test_get_by_priority_exact_should_raise_entry(
     args: tuple[str, list[str]], session: Session, people: dict[str, Person]
 ) -> None:
-    with pytest.raises(EntryNotFound, match="No result found in Person"):
+    with pytest.raises(EntryNotFound, match="No result found in Person for no match"):
         PersonRepository(session).get_by_property_exact(*args)
 
 
+@pytest.mark.parametrize(
+    "repository_class",
+    (
+        pytest.param(PersonRepository, id="single IN"),
+        pytest.param(ChunkedPersonRepository, id="chunked IN"),
+        pytest.param(JoinedPersonRepository, id="temporary table join"),
+    ),
+)
+def test_get_missing_by_property_should_return_values_without_entity(
+    session: Session,
+    people: dict[str, Person],
+    repository_class: type[PersonRepository],
+) -> None:
+    repository = repository_class(session)
+    values = ["John Snow", "no match", "John Pyke", "John Sand", "other", "no match"]
+
+    assert repository.get_missing_by_property("name", values) == {"no match", "other"}
+    assert not repository.get_missing_by_property("name", ["John Snow"])
+    assert not session.identity_map
+
+
+def test_get_missing_by_property_should_raise_attribute_error_given_bad_attribute(
+    session: Session,
+) -> None:
+    with pytest.raises(AttributeError, match="bad key is not a column in the Person"):
+        PersonRepository(session).get_missing_by_property("bad key", ["whatever"])
+
+
 # NOTE: tests WRITE operations on empty database
 #
 def test_delete_should_raise_invalad_request_error_given_a_non_existing_entity(
@@ -333,3 +734,154 @@ def test_delete_should_delete_entity_given_it_exists_in_db(
         repository.delete(snow)
     assert snow.id is not None
     assert repository.get(id=snow.id) is None
+
+
+def test_create_many_should_insert_entities_and_dicts_returning_keys(
+    session: Session,
+) -> None:
+    repository = PersonRepository(session)
+    person_id = UUID("0b1e8a8e-40a7-4c33-8bb4-0e8c0b0f8d36")
+    with session.begin():
+        keys = repository.create_many(
+            [
+                Person(id=person_id, name="Bulk Entity", age=1),
+                {"name": "Bulk Dict", "age": 2},
+            ],
+            return_keys=True,
+        )
+
+    assert len(keys) == 2 and keys[0] == person_id
+    assert repository.get_or_fail(id=keys[1]).name == "Bulk Dict"
+    assert repository.get_or_fail(name="Bulk Entity").age == 1
+
+
+def test_create_many_should_return_nothing_given_no_entities(
+    session: Session,
+) -> None:
+    assert not PersonRepository(session).create_many([], return_keys=True)
+
+
+def test_create_many_should_raise_invalid_request_error_given_a_bad_column(
+    session: Session,
+) -> None:
+    with pytest.raises(InvalidRequestError, match="bad is not a column in the Person"):
+        PersonRepository(session).create_many([{"name": "Bad", "bad": 1}])
+
+
+def test_upsert_many_should_update_conflicting_rows_and_insert_new_ones(
+    session: Session,
+) -> None:
+    repository = PersonRepository(session)
+    person_id = UUID("7dbd3a54-4d4a-4c4b-9a68-1f0b7b1c5b0e")
+    with session.begin():
+        repository.create_many([{"id": person_id, "name": "Upsert Old", "age": 1}])
+
+    with session.begin():
+        keys = repository.upsert_many(
+            [
+                {"id": person_id, "name": "Upsert New", "age": 2},
+                {"name": "Upsert Inserted", "age": 3},
+            ],
+            return_keys=True,
+        )
+
+    session.expire_all()
+    assert keys[0] == person_id
+    assert repository.get_or_fail(id=person_id).name == "Upsert New"
+    assert repository.get_or_fail(id=keys[1]).age == 3
+
+
+def test_upsert_many_should_do_nothing_on_conflict_given_no_update_columns(
+    session: Session,
+) -> None:
+    repository = PersonRepository(session)
+    with session.begin():
+        repository.create_many([{"name": "Upsert Kept", "age": 1}])
+
+    with session.begin():
+        repository.upsert_many(
+            [{"name": "Upsert Kept", "age": 2}], index_elements=["name"], update=[]
+        )
+
+    session.expire_all()
+    assert repository.get_or_fail(name="Upsert Kept").age == 1
+
+
+def test_update_where_should_update_matching_rows_and_loaded_entities(
+    session: Session,
+) -> None:
+    repository = PersonRepository(session)
+    with session.begin():
+        repository.create_many(
+            [{"name": "Update One", "age": 41}, {"name": "Update Two", "age": 41}]
+        )
+
+    with session.begin():
+        loaded = repository.get_or_fail(name="Update One")
+        assert repository.update_where({"age": 42}, age=41) == 2
+        assert loaded.age == 42
+
+    assert repository.count(age=42) == 2
+    assert not repository.count(age=41)
+
+
+def test_delete_where_should_delete_matching_rows_and_loaded_entities(
+    session: Session,
+) -> None:
+    repository = PersonRepository(session)
+    with session.begin():
+        repository.create_many(
+            [{"name": "Delete One", "age": 51}, {"name": "Delete Two", "age": 51}]
+        )
+
+    with session.begin():
+        loaded = repository.get_or_fail(name="Delete One")
+        assert repository.delete_where(age=51) == 2
+        assert loaded not in session
+
+    assert not repository.count(age=51)
+
+
+@pytest.mark.parametrize(
+    "call, error, match",
+    (
+        pytest.param(
+            lambda r: r.update_where({"age": 1}),
+            ValueError,
+            "At least one filter is required",
+            id="update without filter",
+        ),
+        pytest.param(
+            lambda r: r.delete_where(),
+            ValueError,
+            "At least one filter is required",
+            id="delete without filter",
+        ),
+        pytest.param(
+            lambda r: r.update_where({}, age=1),
+            ValueError,
+            "No values given to update",
+            id="update without values",
+        ),
+        pytest.param(
+            lambda r: r.update_where({"bad": 1}, age=1),
+            InvalidRequestError,
+            "bad is not a column in the Person",
+            id="update bad value column",
+        ),
+        pytest.param(
+            lambda r: r.delete_where(bad=1),
+            InvalidRequestError,
+            "bad is not a column in the Person",
+            id="delete bad filter column",
+        ),
+    ),
+)
+def test_x_where_should_raise_given_bad_arguments(
+    session: Session,
+    call: Callable[[PersonRepository], int],
+    error: type[Exception],
+    match: str,
+) -> None:
+    with pytest.raises(error, match=match):
+        call(PersonRepository(session))
@@ -0,0 +1,86 @@
+from collections.abc import Iterator
+from datetime import datetime
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.model import Person
+from app.repository import PersonRepository
+from gfmodules_python_shared.repository.statement_cache import (
+    CompileCacheStats,
+    StatementCache,
+)
+
+NAMES = ("Statement One", "Statement Two", "Statement Three")
+
+
+class StatementCachedPersonRepository(PersonRepository):
+    statement_cache = StatementCache()
+
+
+class UncachedPersonRepository(PersonRepository):
+    statement_cache = None
+
+
+@pytest.fixture(scope="module", autouse=True)
+def people(session_maker: sessionmaker[Session]) -> None:
+    with session_maker.begin() as session:
+        session.add_all(
+            Person(name=name, age=i, created_at=datetime(1990 + i, 1, 1))
+            for i, name in enumerate(NAMES)
+        )
+
+
+@pytest.fixture
+def compile_cache(session_maker: sessionmaker[Session]) -> Iterator[CompileCacheStats]:
+    engine = session_maker.kw["bind"]
+    stats = CompileCacheStats().listen(engine)
+    yield stats
+    stats.remove(engine)
+
+
+def test_statements_are_cached_per_filter_shape(session: Session) -> None:
+    repository = StatementCachedPersonRepository(session)
+
+    assert [repository.get_or_fail(name=name).age for name in NAMES] == [0, 1, 2]
+    assert repository._get_statement(name="a") is repository._get_statement(name="b")
+    assert repository._get_statement(name="a") is not repository._get_statement(age=1)
+
+    cache = StatementCachedPersonRepository.statement_cache
+    assert cache is not None
+    assert (cache.hits, cache.misses) == (5, 2)
+
+
+def test_limit_and_offset_are_bound(session: Session) -> None:
+    repository = StatementCachedPersonRepository(session)
+
+    pages = [
+        [p.name for p in repository.get_many(limit=1, offset=offset, age=offset)]
+        for offset in (0, 1)
+    ]
+
+    assert pages == [["Statement One"], []]
+    assert repository.get_many(limit=2, offset=0) == repository.get_many(
+        limit=2, offset=0
+    )
+    assert repository.count(age=2) == 1
+    assert repository.count(age=3) == 0
+
+
+def test_cached_statements_hit_the_compiled_cache(
+    session: Session, compile_cache: CompileCacheStats
+) -> None:
+    repository = StatementCachedPersonRepository(session)
+    for name in NAMES:
+        repository.get(name=name)
+        repository.count(name=name)
+
+    assert compile_cache.hits >= 4
+    assert compile_cache.hit_ratio > 0.5
+
+
+def test_statements_are_built_every_call_without_cache(session: Session) -> None:
+    repository = UncachedPersonRepository(session)
+
+    assert repository._count_statement() is not repository._count_statement()
+    assert repository.count(name="Statement Two") == 1
@@ -0,0 +1,32 @@
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.model import Person
+from app.repository import PersonRepository
+from gfmodules_python_shared.schema.model_metadata import get_model_metadata
+
+
+def test_model_metadata_should_describe_the_model_columns() -> None:
+    metadata = get_model_metadata(Person)
+
+    assert metadata.model is Person
+    assert metadata.column_names == ("id", "name", "age", "created_at")
+    assert metadata.columns == {"id", "name", "age", "created_at"}
+    assert metadata.primary_key == ("id",)
+    assert metadata.attributes["name"] is Person.name
+    person = Person(id=UUID(int=1), name="John", age=3, created_at=None)
+    assert metadata.values(person) == (UUID(int=1), "John", 3, None)
+
+
+def test_model_metadata_should_be_resolved_once_per_model() -> None:
+    assert get_model_metadata(Person) is get_model_metadata(Person)
+
+
+def test_repository_should_read_the_model_metadata_from_the_registry(
+    session: Session,
+) -> None:
+    repository = PersonRepository(session)
+
+    assert repository.model is Person
+    assert repository.model_metadata is get_model_metadata(Person)
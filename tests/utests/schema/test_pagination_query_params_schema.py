@@ -11,6 +11,7 @@ def test_pagination_params_defaults() -> None:
 
     assert params.limit == 10
     assert params.offset == 0
+    assert params.cursor is None
 
 
 def test_pagination_params_custom_values() -> None:
@@ -34,3 +35,10 @@ def test_pagination_params_invalid_offset() -> None:
     with pytest.raises(ValidationError) as excinfo:
         PaginationQueryParams(offset=-1)
     assert "Input should be greater than or equal to 0" in str(excinfo.value)
+
+
+def test_pagination_params_cursor_by_alias() -> None:
+    params = PaginationQueryParams(cursor="WzFd")
+
+    assert params.cursor == "WzFd"
+    assert params.model_dump(by_alias=True)["cursor"] == "WzFd"
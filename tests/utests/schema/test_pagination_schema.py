@@ -23,6 +23,19 @@ def test_page_schema() -> None:
     json_data = user_page.model_dump_json()
     expected_json = (
         '{"items":[{"id":1,"name":"John Doe"},{"id":2,"name":"Jane Smith"}],'
-        '"limit":10,"offset":0,"total":50}'
+        '"limit":10,"offset":0,"total":50,"next_cursor":null,"has_next":null}'
     )
     assert json_data == expected_json
+
+
+def test_page_schema_with_next_cursor() -> None:
+    user_page = Page[User](
+        items=[User(id=1, name="John Doe")],
+        limit=1,
+        offset=0,
+        total=50,
+        next_cursor="WzFd",
+    )
+
+    assert user_page.next_cursor == "WzFd"
+    assert '"nextCursor":"WzFd"' in user_page.model_dump_json(by_alias=True)
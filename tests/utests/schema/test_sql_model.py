@@ -75,3 +75,51 @@ def test_overide_repr_include_name(model_id: UUID, time: datetime) -> None:
 
     model = NamedModel(id=model_id, name="some name", age=11, time=time)
     assert repr(model) == "NamedModel(name='some name')"
+
+
+def test_to_dict(model: Model, model_id: UUID, time: datetime) -> None:
+    assert model.to_dict() == {
+        "id": model_id,
+        "name": "some name",
+        "age": 11,
+        "time": time,
+    }
+    assert model.to_dict(exclude={"id", "time"}) == {"name": "some name", "age": 11}
+    assert model.to_dict(include={"age"}) == {"age": 11}
+
+
+def test_to_dict_excluding_every_column(model: Model) -> None:
+    columns = {"id", "name", "age", "time"}
+
+    assert model.to_dict(exclude=columns) == {}
+    assert Model.to_dicts([model], exclude=columns) == [{}]
+    assert Model.to_columns([model], exclude=columns) == {}
+
+
+def test_to_dicts(model: Model) -> None:
+    other = Model(id=UUID(int=1), name="other", age=12, time=model.time)
+
+    assert Model.to_dicts([model, other]) == [model.to_dict(), other.to_dict()]
+    assert Model.to_dicts([model, other], include={"name"}) == [
+        {"name": "some name"},
+        {"name": "other"},
+    ]
+    assert Model.to_dicts([]) == []
+
+
+def test_to_columns(model: Model, model_id: UUID, time: datetime) -> None:
+    other = Model(id=UUID(int=1), name="other", age=12, time=time)
+
+    assert Model.to_columns([model, other]) == {
+        "id": [model_id, UUID(int=1)],
+        "name": ["some name", "other"],
+        "age": [11, 12],
+        "time": [time, time],
+    }
+    assert Model.to_columns([model], exclude={"id", "time"}) == {
+        "name": ["some name"],
+        "age": [11],
+    }
+    assert Model.to_columns([], include={"age"}) == {"age": []}
+    with pytest.raises(ValueError, match="Either exclude or include not both"):
+        Model.to_columns([model], exclude={"id"}, include={"age"})
@@ -1,12 +1,19 @@
+from collections.abc import Callable, Iterator
 from typing import Any
 from uuid import UUID, uuid4
 
 import pytest
 from sqlalchemy import ColumnExpressionArgument, ForeignKey, String
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, Session, mapped_column, relationship, sessionmaker
 
 from gfmodules_python_shared.repository.base import RepositoryBase
 from gfmodules_python_shared.schema.sql_model import SQLModelBase
+from gfmodules_python_shared.session.query_budget import (
+    QueryBudget,
+    QueryBudgetExceeded,
+    register_query_budget,
+    unregister_query_budget,
+)
 from gfmodules_python_shared.session.session_manager import (
     get_repository,
     session_manager,
@@ -113,3 +120,32 @@ def test_user_post_presists_in_db_when_users_posts_modified(user: User) -> None:
     assert post and post.message == message
     remove_post(user.id, post.id)
     assert not get_user(user.id).posts
+
+
+@pytest.fixture
+def budget(session_maker: sessionmaker[Session]) -> Iterator[Callable[[int], None]]:
+    yield lambda statements: register_query_budget(
+        session_maker, QueryBudget(statements, action="raise")
+    )
+    unregister_query_budget(session_maker)
+
+
+def test_services_run_a_fixed_number_of_statements(
+    budget: Callable[[int], None],
+) -> None:
+    budget(4)
+    user = add_user("budgeted name")
+    assert get_user(user.id)
+    assert add_post(user.id, "a message")
+
+
+def test_services_over_budget_raise_with_the_statements(
+    budget: Callable[[int], None],
+) -> None:
+    user = add_user("over budget name")
+    budget(3)
+    with pytest.raises(QueryBudgetExceeded, match="over its budget of 3") as e:
+        get_user(user.id)
+
+    assert len(e.value.statements) == 4
+    assert sum("FROM posts" in statement for statement in e.value.statements) == 2
@@ -0,0 +1,94 @@
+import asyncio
+from collections.abc import Callable
+from unittest.mock import AsyncMock, MagicMock
+from uuid import UUID
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.model import Person
+from app.repository import AsyncPersonRepository, PersonRepository
+from gfmodules_python_shared.session.async_session_manager import (
+    async_service_transaction_retry_policy,
+    async_session_manager,
+)
+from gfmodules_python_shared.session.session_manager import get_repository
+from tests.utests.conftest import AsyncTest
+
+ID = UUID("ce27130b-5449-4a3a-90db-57d96daf117b")
+
+
+@async_session_manager
+async def add_person(
+    name: str, person_repository: AsyncPersonRepository = get_repository()
+) -> Person:
+    person = Person(id=ID, name=name)
+    person_repository.create(person)
+    return person
+
+
+@async_session_manager
+async def get_people(
+    person_repository: AsyncPersonRepository = get_repository(),
+    sync_repository: PersonRepository = get_repository(),
+) -> list[Person]:
+    assert sync_repository is None
+    return list(await person_repository.get_many())
+
+
+def test_async_session_manager_should_inject_repositories_and_commit(
+    run_async: Callable[[AsyncTest], None],
+) -> None:
+    async def test(_: async_sessionmaker[AsyncSession]) -> None:
+        person = await add_person("John Snow")
+        assert person.id == ID and person.name == "John Snow"
+
+        people = await get_people()
+        assert [p.name for p in people] == ["John Snow"]
+
+    run_async(test)
+
+
+operational_error = OperationalError(None, None, Exception("database is locked"))
+
+
+@pytest.fixture
+def mock_sleep(monkeypatch: pytest.MonkeyPatch) -> AsyncMock:
+    sleep = AsyncMock()
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    return sleep
+
+
+@pytest.mark.parametrize(
+    "side_effects, call_count",
+    (
+        pytest.param(["Success"], 1, id="happy path"),
+        pytest.param([operational_error, "Success"], 2, id="single operational error"),
+    ),
+)
+def test_async_service_transaction_retry_policy_success(
+    side_effects: list[Exception | str], call_count: int, mock_sleep: AsyncMock
+) -> None:
+    service = AsyncMock(side_effect=side_effects)
+
+    result = asyncio.run(
+        async_service_transaction_retry_policy(MagicMock(spec=AsyncSession), service)
+    )
+
+    assert result == "Success"
+    assert service.await_count == call_count
+    assert mock_sleep.await_count == call_count - 1
+
+
+def test_async_service_transaction_retry_policy_failure(mock_sleep: AsyncMock) -> None:
+    service = AsyncMock(side_effect=operational_error, __name__="service")
+
+    with pytest.raises(RuntimeError, match="failed after 3 retries"):
+        asyncio.run(
+            async_service_transaction_retry_policy(
+                MagicMock(spec=AsyncSession), service
+            )
+        )
+
+    assert service.await_count == 3
@@ -0,0 +1,146 @@
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+
+import inject
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.model import Person
+from gfmodules_python_shared.repository.exceptions import EntryNotFound
+from gfmodules_python_shared.session.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    get_circuit_breaker,
+    register_circuit_breaker,
+)
+from gfmodules_python_shared.session.retry_policy import RetryPolicy
+from gfmodules_python_shared.session.session_manager import session_manager
+
+operational_error = OperationalError(None, None, Exception("database is locked"))
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock: Clock) -> CircuitBreaker:
+    return CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+
+
+def fail(breaker: CircuitBreaker, error: Exception = operational_error) -> None:
+    with pytest.raises(type(error)), breaker.guard():
+        raise error
+
+
+def succeed(breaker: CircuitBreaker) -> None:
+    with breaker.guard():
+        pass
+
+
+def test_circuit_breaker_should_open_after_consecutive_failures(
+    breaker: CircuitBreaker,
+) -> None:
+    fail(breaker)
+    succeed(breaker)
+    fail(breaker)
+    assert breaker.state is CircuitState.CLOSED
+
+    fail(breaker)
+    assert breaker.stats()["state"] == "open"
+
+    with pytest.raises(CircuitOpenError), breaker.guard():
+        raise AssertionError("call not rejected")
+
+    assert breaker.stats() == {
+        "state": "open",
+        "failures": 0,
+        "rejected": 1,
+        "transitions": {"closed": 0, "open": 1, "half_open": 0},
+    }
+
+
+def test_circuit_breaker_should_ignore_permanent_errors(
+    breaker: CircuitBreaker,
+) -> None:
+    for _ in range(3):
+        fail(breaker, EntryNotFound(Person))
+
+    assert breaker.state is CircuitState.CLOSED
+
+
+def test_circuit_breaker_should_limit_trial_calls_when_half_open(
+    breaker: CircuitBreaker, clock: Clock
+) -> None:
+    fail(breaker)
+    fail(breaker)
+    clock.now = 10
+    assert breaker.state is CircuitState.HALF_OPEN
+
+    with breaker.guard(), pytest.raises(CircuitOpenError), breaker.guard():
+        pass
+    assert breaker.stats()["state"] == "closed"
+    assert breaker.transitions == {
+        CircuitState.OPEN: 1,
+        CircuitState.HALF_OPEN: 1,
+        CircuitState.CLOSED: 1,
+    }
+
+
+def test_circuit_breaker_should_reopen_when_trial_fails(
+    breaker: CircuitBreaker, clock: Clock
+) -> None:
+    fail(breaker)
+    fail(breaker)
+    clock.now = 10
+    fail(breaker)
+
+    assert breaker.state is CircuitState.OPEN
+    clock.now = 15
+    assert breaker.state is CircuitState.OPEN
+    clock.now = 20
+    assert breaker.stats()["state"] == "half_open"
+
+
+@pytest.fixture
+def session_maker(monkeypatch: pytest.MonkeyPatch) -> Iterator[MagicMock]:
+    session_maker = MagicMock(spec=sessionmaker)
+    session_maker.return_value.__enter__.return_value = MagicMock(spec=Session)
+    with monkeypatch.context() as mp:
+        mp.setattr(
+            inject, "instance", lambda cls: {sessionmaker[Session]: session_maker}[cls]
+        )
+        yield session_maker
+
+
+@session_manager(retry_policy=RetryPolicy(attempts=1))
+def unavailable() -> None:
+    raise operational_error
+
+
+def test_session_manager_should_reject_calls_while_circuit_is_open(
+    session_maker: MagicMock,
+) -> None:
+    assert get_circuit_breaker(session_maker) is None
+    breaker = register_circuit_breaker(session_maker, CircuitBreaker(2))
+    assert get_circuit_breaker(session_maker) is breaker
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError, match="failed after 1 retries"):
+            unavailable()
+    assert session_maker.call_count == 2
+
+    with pytest.raises(CircuitOpenError):
+        unavailable()
+    assert session_maker.call_count == 2
@@ -0,0 +1,96 @@
+from collections.abc import Iterator
+from threading import Event
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import QueuePool, create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from gfmodules_python_shared.session.healthy import (
+    HealthChecker,
+    get_health_checker,
+    is_healthy_database,
+)
+
+
+@pytest.fixture
+def health_checker(session_maker: sessionmaker[Session]) -> Iterator[HealthChecker]:
+    health_checker = HealthChecker(session_maker, interval=0.01, ttl=60, timeout=1)
+    yield health_checker
+    health_checker.stop()
+
+
+def test_health_checker_should_report_pool_statistics() -> None:
+    engine = create_engine(
+        "sqlite://", poolclass=QueuePool, pool_size=2, max_overflow=1
+    )
+    status = HealthChecker(sessionmaker(engine)).check()
+
+    assert status.healthy and status.error is None
+    assert status.latency is not None and status.latency > 0
+    assert status.pool.keys() == {
+        "size",
+        "checked_in",
+        "checked_out",
+        "overflow",
+        "wait_time",
+    }
+    assert status.pool["size"] == 2
+
+
+def test_health_checker_should_keep_status_for_ttl(
+    health_checker: HealthChecker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    status = health_checker.status
+    monkeypatch.setattr(health_checker, "_probe", MagicMock())
+
+    assert health_checker.status is status
+    monkeypatch.setattr(health_checker, "ttl", 0)
+    assert health_checker.status is not status
+
+
+def test_health_checker_should_report_errors() -> None:
+    session_maker = MagicMock(spec=sessionmaker)
+    session_maker.return_value.__enter__.return_value.connection.side_effect = (
+        OperationalError("SELECT 1", None, Exception("connection refused"))
+    )
+
+    status = HealthChecker(session_maker).check()
+
+    assert not status.healthy
+    assert status.error is not None and "connection refused" in status.error
+
+
+def test_health_checker_should_time_out_hung_probes() -> None:
+    hung, session_maker = Event(), MagicMock(spec=sessionmaker)
+    session_maker.return_value.__enter__.return_value.connection.side_effect = (
+        lambda: hung.wait()
+    )
+    health_checker = HealthChecker(session_maker, timeout=0.01)
+
+    try:
+        assert health_checker.check().error == "probe timed out after 0.01 seconds"
+        assert not health_checker.check().healthy
+        assert session_maker.call_count == 1
+    finally:
+        hung.set()
+
+
+def test_health_checker_should_probe_in_background(
+    health_checker: HealthChecker,
+) -> None:
+    health_checker.start()
+    first = health_checker.status
+
+    for _ in range(100):
+        if health_checker.status is not first:
+            break
+        Event().wait(0.01)
+    assert health_checker.status is not first
+    assert health_checker.status.healthy
+
+
+def test_is_healthy_database(session_maker: sessionmaker[Session]) -> None:
+    assert is_healthy_database()
+    assert get_health_checker(session_maker) is get_health_checker(session_maker)
@@ -0,0 +1,70 @@
+import logging
+
+import pytest
+from sqlalchemy.orm import Session, sessionmaker
+
+from gfmodules_python_shared.instrumentation import ServiceMetrics
+from gfmodules_python_shared.session.query_budget import (
+    QueryBudget,
+    QueryBudgetExceeded,
+    get_query_budget,
+    register_query_budget,
+    unregister_query_budget,
+)
+from gfmodules_python_shared.session.session_manager import session_manager
+
+STATEMENTS = ["SELECT 1", "SELECT 2", "SELECT 2", "SELECT 2"]
+
+
+def metrics(statements: list[str]) -> ServiceMetrics:
+    return ServiceMetrics("service", statements=len(statements), captured=statements)
+
+
+def test_statements_within_budget_pass() -> None:
+    QueryBudget(4, action="raise").enforce(metrics(STATEMENTS))
+
+
+def test_statements_over_budget_raise_grouped_statements() -> None:
+    with pytest.raises(QueryBudgetExceeded) as e:
+        QueryBudget(3, action="raise").enforce(metrics(STATEMENTS))
+
+    assert str(e.value) == (
+        "Service service executed 4 statements, over its budget of 3:\n"
+        "1 x SELECT 1\n"
+        "3 x SELECT 2"
+    )
+    assert e.value.statements == STATEMENTS
+
+
+def test_statements_over_budget_log_by_default(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    with caplog.at_level(logging.WARNING):
+        QueryBudget(1).enforce(metrics(STATEMENTS))
+
+    (record,) = caplog.records
+    assert "over its budget of 1" in record.message
+
+
+def test_session_manager_enforces_the_service_budget(
+    session_maker: sessionmaker[Session],
+) -> None:
+    @session_manager(query_budget=QueryBudget(1, action="raise"), refresh=False)
+    def select_twice() -> None:
+        with session_maker() as session:
+            session.connection().exec_driver_sql("SELECT 1")
+            session.connection().exec_driver_sql("SELECT 2")
+
+    with pytest.raises(QueryBudgetExceeded, match="executed 2 statements"):
+        select_twice()
+
+
+def test_registered_budgets_can_be_unregistered(
+    session_maker: sessionmaker[Session],
+) -> None:
+    budget = QueryBudget(3)
+
+    register_query_budget(session_maker, budget)
+    assert get_query_budget(session_maker) is budget
+    unregister_query_budget(session_maker)
+    assert get_query_budget(session_maker) is None
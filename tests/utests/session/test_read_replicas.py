@@ -0,0 +1,112 @@
+from collections.abc import Iterator
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import StaticPool, create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.model import Person
+from app.repository import PersonRepository
+from gfmodules_python_shared.repository.exceptions import EntryNotFound
+from gfmodules_python_shared.schema.sql_model import SQLModelBase
+from gfmodules_python_shared.session import read_replicas
+from gfmodules_python_shared.session.read_replicas import (
+    ReplicaRouter,
+    register_read_replicas,
+)
+from gfmodules_python_shared.session.session_manager import (
+    get_repository,
+    session_manager,
+)
+
+operational_error = OperationalError(None, None, Exception("database is locked"))
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_replica_router_should_select_round_robin() -> None:
+    router = ReplicaRouter("primary", ["a", "b"])
+
+    assert [router.select() for _ in range(5)] == ["a", "b", "a", "b", "a"]
+
+
+def test_replica_router_should_select_least_connections() -> None:
+    replicas = [MagicMock(spec=sessionmaker) for _ in range(3)]
+    for replica, checked_out in zip(replicas, (3, 1, 2)):
+        replica.kw = {"bind": MagicMock(spec=["pool"])}
+        replica.kw["bind"].pool.checkedout.return_value = checked_out
+    router = ReplicaRouter(MagicMock(), replicas, strategy="least_connections")
+
+    assert router.select() is replicas[1]
+
+
+def test_replica_router_should_skip_failed_replicas_during_cooldown() -> None:
+    clock = Clock()
+    router = ReplicaRouter("primary", ["a", "b"], cooldown=10, clock=clock)
+
+    router.mark_failed("a")
+    assert {router.select() for _ in range(3)} == {"b"}
+
+    router.mark_failed("b")
+    assert router.select() == "primary"
+
+    clock.now = 10
+    assert {router.select() for _ in range(3)} == {"a", "b"}
+
+
+def test_replica_router_should_fall_back_to_primary() -> None:
+    router = ReplicaRouter("primary", ["a"])
+    run = MagicMock(side_effect=[operational_error, "Success"])
+
+    assert router.route(run) == "Success"
+    assert [call.args[0] for call in run.call_args_list] == ["a", "primary"]
+    assert router.select() == "primary"
+
+
+def test_replica_router_should_raise_permanent_errors() -> None:
+    router = ReplicaRouter("primary", ["a"])
+    run = MagicMock(side_effect=EntryNotFound(Person))
+
+    with pytest.raises(EntryNotFound):
+        router.route(run)
+    run.assert_called_once_with("a")
+
+
+@pytest.fixture
+def replica(
+    session_maker: sessionmaker[Session], monkeypatch: pytest.MonkeyPatch
+) -> Iterator[sessionmaker[Session]]:
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    SQLModelBase.metadata.create_all(engine)
+    replica = sessionmaker(engine)
+    with replica.begin() as session:
+        session.add(Person(name="Replicated"))
+
+    monkeypatch.setattr(read_replicas, "_replica_routers", {})
+    register_read_replicas(session_maker, [replica])
+    yield replica
+    engine.dispose()
+
+
+@session_manager(read_only=True)
+def read_names(person_repository: PersonRepository = get_repository()) -> list[str]:
+    return [person.name for person in person_repository.get_many()]
+
+
+@session_manager
+def write_names(person_repository: PersonRepository = get_repository()) -> list[str]:
+    return [person.name for person in person_repository.get_many()]
+
+
+def test_session_manager_should_route_read_only_services_to_replicas(
+    replica: sessionmaker[Session],
+) -> None:
+    assert read_names() == ["Replicated"]
+    assert "Replicated" not in write_names()
@@ -1,9 +1,24 @@
 from unittest.mock import MagicMock
 
 import pytest
-from sqlalchemy.exc import DatabaseError, OperationalError
+from sqlalchemy.exc import (
+    DatabaseError,
+    DisconnectionError,
+    IntegrityError,
+    OperationalError,
+)
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import Session
 
+from app.model import Person
+from gfmodules_python_shared.repository.exceptions import EntryNotFound
+from gfmodules_python_shared.session import retry_policy
+from gfmodules_python_shared.session.retry_policy import (
+    RetriesExhaustedError,
+    RetryBudget,
+    RetryPolicy,
+    is_transient,
+)
 from gfmodules_python_shared.session.session_manager import (
     service_transaction_retry_policy,
 )
@@ -21,7 +36,52 @@ def mock_service() -> MagicMock:
     return MagicMock(spec=some_function)
 
 
-operational_error = OperationalError(None, None, Exception())
+@pytest.fixture(autouse=True)
+def mock_sleep(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    sleep = MagicMock()
+    monkeypatch.setattr(retry_policy, "sleep", sleep)
+    return sleep
+
+
+class SQLState(Exception):
+    def __init__(self, sqlstate: str) -> None:
+        self.sqlstate = sqlstate
+
+
+operational_error = OperationalError(None, None, Exception("database is locked"))
+serialization_failure = DatabaseError(None, None, SQLState("40001"))
+missing_table = OperationalError(None, None, Exception("no such table: person"))
+
+
+@pytest.mark.parametrize(
+    "error, transient",
+    (
+        pytest.param(operational_error, True, id="database is locked"),
+        pytest.param(missing_table, False, id="no such table"),
+        pytest.param(DisconnectionError(), True, id="disconnection"),
+        pytest.param(PoolTimeoutError(), True, id="pool timeout"),
+        pytest.param(serialization_failure, True, id="serialization failure"),
+        pytest.param(DatabaseError(None, None, SQLState("40P01")), True, id="deadlock"),
+        pytest.param(
+            DatabaseError(None, None, SQLState("08006")), True, id="connection failure"
+        ),
+        pytest.param(
+            DatabaseError(None, None, Exception(), connection_invalidated=True),
+            True,
+            id="disconnect",
+        ),
+        pytest.param(
+            DatabaseError(None, None, Exception()), False, id="database error"
+        ),
+        pytest.param(
+            IntegrityError(None, None, SQLState("23505")), False, id="unique violation"
+        ),
+        pytest.param(EntryNotFound(Person), False, id="entry not found"),
+        pytest.param(ValueError(), False, id="validation error"),
+    ),
+)
+def test_is_transient(error: Exception, transient: bool) -> None:
+    assert is_transient(error) is transient
 
 
 @pytest.mark.parametrize(
@@ -30,12 +90,9 @@ operational_error = OperationalError(None, None, Exception())
         pytest.param(["Success"], 1, id="happy path"),
         pytest.param([operational_error, "Success"], 2, id="single operational error"),
         pytest.param(
-            [DatabaseError(None, None, Exception()), "Success"],
-            2,
-            id="single database error",
-        ),
-        pytest.param(
-            [AttributeError, ValueError, "Success"], 3, id="two generic errors"
+            [serialization_failure, operational_error, "Success"],
+            3,
+            id="two transient errors",
         ),
     ),
 )
@@ -44,21 +101,96 @@ def test_service_transaction_retry_policy_success(
     call_count: int,
     mock_session: MagicMock,
     mock_service: MagicMock,
+    mock_sleep: MagicMock,
 ) -> None:
     mock_service.side_effect = side_effects
 
     result = service_transaction_retry_policy(mock_session, mock_service)
 
     assert mock_service.call_count == call_count
+    assert mock_sleep.call_count == call_count - 1
     assert result == "Success"
 
 
+@pytest.mark.parametrize(
+    "error",
+    (
+        pytest.param(EntryNotFound(Person), id="entry not found"),
+        pytest.param(AttributeError(), id="generic error"),
+        pytest.param(DatabaseError(None, None, Exception()), id="database error"),
+        pytest.param(missing_table, id="no such table"),
+    ),
+)
+def test_service_transaction_retry_policy_should_fail_fast_on_permanent_errors(
+    error: Exception,
+    mock_session: MagicMock,
+    mock_service: MagicMock,
+    mock_sleep: MagicMock,
+) -> None:
+    mock_service.side_effect = [error, "Success"]
+
+    with pytest.raises(type(error)) as exc_info:
+        service_transaction_retry_policy(mock_session, mock_service)
+
+    assert exc_info.value is error
+    assert mock_service.call_count == 1
+    mock_sleep.assert_not_called()
+
+
 def test_service_transaction_retry_policy_failure(
-    mock_session: MagicMock, mock_service: MagicMock
+    mock_session: MagicMock, mock_service: MagicMock, mock_sleep: MagicMock
 ) -> None:
     mock_service.side_effect = operational_error
 
-    with pytest.raises(RuntimeError, match="failed after 3 retries"):
+    with pytest.raises(RuntimeError, match="failed after 3 retries") as exc_info:
         service_transaction_retry_policy(mock_session, mock_service)
 
+    assert isinstance(exc_info.value, RetriesExhaustedError)
+    assert exc_info.value.__cause__ is operational_error
     assert mock_service.call_count == 3
+    assert mock_sleep.call_count == 2
+
+
+def test_retry_policy_delays_should_grow_with_decorrelated_jitter(
+    mock_session: MagicMock, mock_service: MagicMock, mock_sleep: MagicMock
+) -> None:
+    mock_service.side_effect = operational_error
+    policy = RetryPolicy(attempts=10, base_delay=0.1, max_delay=0.5, budget=None)
+
+    with pytest.raises(RetriesExhaustedError):
+        policy.run(mock_session, mock_service)
+
+    delays = [call.args[0] for call in mock_sleep.call_args_list]
+    assert len(delays) == 9
+    assert all(0.1 <= delay <= 0.5 for delay in delays)
+    assert all(d <= max(p * 3, 0.1) for p, d in zip(delays, delays[1:]))
+
+
+def test_retry_policy_should_stop_at_deadline(
+    mock_session: MagicMock, mock_service: MagicMock, mock_sleep: MagicMock
+) -> None:
+    mock_service.side_effect = operational_error
+    policy = RetryPolicy(attempts=10, base_delay=1, max_delay=1, deadline=0.5)
+
+    with pytest.raises(RetriesExhaustedError, match="failed after 1 retries"):
+        policy.run(mock_session, mock_service)
+
+    mock_sleep.assert_not_called()
+
+
+def test_retry_policy_should_stop_when_budget_is_spent(
+    mock_session: MagicMock, mock_service: MagicMock, mock_sleep: MagicMock
+) -> None:
+    budget = RetryBudget(max_tokens=1, token_ratio=0.5)
+    policy = RetryPolicy(attempts=10, budget=budget)
+    mock_service.side_effect = operational_error
+
+    with pytest.raises(RetriesExhaustedError, match="failed after 2 retries"):
+        policy.run(mock_session, mock_service)
+    assert mock_sleep.call_count == 1
+
+    mock_service.side_effect = ["Success", "Success", operational_error, "Success"]
+    assert policy.run(mock_session, mock_service) == "Success"
+    assert policy.run(mock_session, mock_service) == "Success"
+    assert policy.run(mock_session, mock_service) == "Success"
+    assert budget.tokens == pytest.approx(0.5)
@@ -1,3 +1,4 @@
+import inspect
 from collections.abc import Callable, Iterator
 from typing import Any, Final, ParamSpec
 from unittest.mock import MagicMock
@@ -12,8 +13,10 @@ from app.repository import PersonRepository
 from app.service import PersonService
 from gfmodules_python_shared.repository.base import GenericRepository
 from gfmodules_python_shared.schema.sql_model import TSQLModel
+from gfmodules_python_shared.session.retry_policy import RetryPolicy
 from gfmodules_python_shared.session.session_manager import (
     get_repository,
+    repository_parameters,
     session_manager,
 )
 
@@ -158,3 +161,36 @@ def test_no_decorator(
 def test_no_repository_instansiation() -> None:
     with pytest.raises(AttributeError, match=r"'NoneType' object has no attribute .*"):
         get_or_create(person_id=ID)
+
+
+def test_repository_parameters_are_resolved_once(
+    monkeypatch: pytest.MonkeyPatch, mock_inject: tuple[MagicMock, MagicMock]
+) -> None:
+    service = session_manager(is_repositories_instansiated)
+
+    def fail(*_: Any) -> None:
+        raise AssertionError("signature inspected on call")
+
+    monkeypatch.setattr(inspect, "signature", fail)
+    assert service(ID) and service(ID)
+
+
+def test_repository_parameters() -> None:
+    assert repository_parameters(get_or_create) == (
+        ("person_repository", PersonRepository),
+    )
+    assert repository_parameters(PersonService.get_one.__wrapped__) == (  # type: ignore
+        ("person_repository", PersonRepository),
+    )
+    assert not repository_parameters(lambda x, y=None: x)
+
+
+def test_session_manager_should_use_the_given_retry_policy(
+    mock_inject: tuple[MagicMock, MagicMock],
+) -> None:
+    policy = MagicMock(spec=RetryPolicy)
+    policy.run.return_value = person = Person(id=ID, name="John Snow")
+    service = session_manager(refresh=False, retry_policy=policy)(get_or_create)
+
+    assert service(ID) is person
+    policy.run.assert_called_once()
@@ -0,0 +1,112 @@
+from collections.abc import Callable, Iterable
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.model import Person
+from app.repository import PersonRepository
+from gfmodules_python_shared.session.session_manager import (
+    get_repository,
+    read_only_service,
+    session_manager,
+    sync_value_with_database,
+)
+
+NAMES = [f"Sync {i}" for i in range(5)]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def people(
+    session_maker: sessionmaker[Session],
+    insert_entities: Callable[[Session, Iterable[Person]], None],
+) -> None:
+    with session_maker() as session:
+        insert_entities(session, [Person(name=name) for name in NAMES])
+
+
+def test_sync_value_with_database_should_reload_entities_in_one_statement(
+    session: Session, statements: list[str]
+) -> None:
+    with session.begin():
+        people = PersonRepository(session).get_by_property("name", NAMES)
+    statements.clear()
+
+    sync_value_with_database(session, [*people, "not an entity", (people[0],)])
+
+    assert len(statements) == 1
+    session.close()
+    assert sorted(person.name for person in people) == NAMES
+    assert len(statements) == 1
+
+
+def test_sync_value_with_database_should_skip_entities_not_in_session(
+    session: Session, statements: list[str]
+) -> None:
+    sync_value_with_database(session, [Person(name="transient"), "text", None])
+
+    assert not statements
+
+
+@session_manager
+def get_people(person_repository: PersonRepository = get_repository()) -> list[Person]:
+    return list(person_repository.get_by_property("name", NAMES))
+
+
+@session_manager(refresh=False)
+def get_loaded_people(
+    person_repository: PersonRepository = get_repository(),
+) -> list[Person]:
+    return list(person_repository.get_by_property("name", NAMES))
+
+
+@pytest.mark.parametrize(
+    "service, refresh_statements",
+    (
+        pytest.param(get_people, 1, id="refreshed"),
+        pytest.param(get_loaded_people, 0, id="not refreshed"),
+    ),
+)
+def test_session_manager_refresh(
+    service: Callable[[], list[Person]],
+    refresh_statements: int,
+    statements: list[str],
+) -> None:
+    people = service()
+
+    assert sorted(person.name for person in people) == NAMES
+    assert len(statements) == 1 + refresh_statements
+
+
+@session_manager(read_only=True)
+def read_people(
+    person_repository: PersonRepository = get_repository(),
+) -> list[Person]:
+    assert not person_repository.session.autoflush
+    return list(person_repository.get_by_property("name", NAMES))
+
+
+def test_session_manager_read_only_should_return_detached_entities(
+    statements: list[str],
+) -> None:
+    people = read_people()
+
+    assert len(statements) == 1
+    assert all(inspect(person).detached for person in people)
+    assert sorted(person.name for person in people) == NAMES
+
+
+@pytest.mark.parametrize(
+    "dialect, set_read_only", (("postgresql", True), ("sqlite", False))
+)
+def test_read_only_service_should_mark_the_transaction_read_only(
+    dialect: str, set_read_only: bool
+) -> None:
+    session = MagicMock(spec=Session)
+    session.get_bind.return_value.dialect.name = dialect
+
+    assert read_only_service(session, lambda: "Success")() == "Success"
+
+    assert session.execute.called is set_read_only
+    session.expunge_all.assert_called_once()
@@ -0,0 +1,170 @@
+import logging
+from collections.abc import Callable, Iterator
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.model import Person
+from app.repository import AsyncPersonRepository, PersonRepository
+from gfmodules_python_shared import instrumentation
+from gfmodules_python_shared.instrumentation import (
+    LoggingSink,
+    ServiceMetrics,
+    SpanSink,
+    current_metrics,
+    register_instrumentation_sink,
+)
+from gfmodules_python_shared.session import retry_policy
+from gfmodules_python_shared.session.async_session_manager import (
+    async_session_manager,
+)
+from gfmodules_python_shared.session.session_manager import (
+    get_repository,
+    session_manager,
+)
+from tests.utests.conftest import AsyncTest
+
+
+class RecordingSink:
+    def __init__(self) -> None:
+        self.recorded: list[ServiceMetrics] = []
+
+    def record(self, metrics: ServiceMetrics) -> None:
+        self.recorded.append(metrics)
+
+
+@pytest.fixture
+def sink(session_maker: sessionmaker[Session]) -> Iterator[RecordingSink]:
+    sink = RecordingSink()
+    register_instrumentation_sink(session_maker, sink)
+    yield sink
+    instrumentation._instrumentation_sinks.clear()
+
+
+@session_manager
+def add_and_list_people(
+    *names: str, person_repository: PersonRepository = get_repository()
+) -> int:
+    for name in names:
+        person_repository.create(Person(name=name))
+    return len(person_repository.get_many(name=names[0]))
+
+
+attempts: list[int] = []
+
+
+@session_manager(refresh=False)
+def fail_once() -> None:
+    attempts.append(1)
+    if len(attempts) == 1:
+        raise OperationalError(None, None, Exception("database is locked"))
+
+
+@session_manager
+def fail() -> None:
+    raise ValueError("permanent")
+
+
+def test_service_calls_are_measured(sink: RecordingSink) -> None:
+    assert add_and_list_people("Measured One", "Measured Two") == 1
+
+    (metrics,) = sink.recorded
+    assert metrics.service.endswith("add_and_list_people")
+    assert metrics.statements == 2
+    assert metrics.rows == 1
+    assert metrics.retries == 0
+    assert metrics.error is None
+    assert 0 < metrics.statement_time <= metrics.duration
+    assert 0 < metrics.connect_wait <= metrics.duration
+    assert current_metrics() is None
+
+
+def test_retries_and_errors_are_measured(
+    sink: RecordingSink, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(retry_policy, "sleep", MagicMock())
+
+    fail_once()
+    with pytest.raises(ValueError):
+        fail()
+
+    retried, failed = sink.recorded
+    assert retried.retries == 1 and retried.backoff > 0
+    assert failed.error == "ValueError"
+
+
+def test_services_are_not_measured_without_sink() -> None:
+    @session_manager
+    def measure() -> ServiceMetrics | None:
+        return current_metrics()
+
+    assert measure() is None
+
+
+def test_async_service_calls_are_measured(
+    run_async: Callable[[AsyncTest], None],
+) -> None:
+    @async_session_manager
+    async def count_people(
+        person_repository: AsyncPersonRepository = get_repository(),
+    ) -> int:
+        person_repository.create(Person(name="Async Measured"))
+        return len(await person_repository.get_many())
+
+    sink = RecordingSink()
+
+    async def test(session_maker: async_sessionmaker[AsyncSession]) -> None:
+        register_instrumentation_sink(session_maker, sink)
+        assert await count_people() == 1
+
+    try:
+        run_async(test)
+    finally:
+        instrumentation._instrumentation_sinks.clear()
+
+    (metrics,) = sink.recorded
+    assert metrics.statements >= 2
+    assert metrics.rows == 1
+    assert metrics.connect_wait > 0
+
+
+def test_logging_sink_logs_slow_services(caplog: pytest.LogCaptureFixture) -> None:
+    sink = LoggingSink(slow_threshold=0.5)
+    with caplog.at_level(logging.INFO):
+        sink.record(ServiceMetrics("fast", duration=0.1))
+        sink.record(ServiceMetrics("slow", duration=1.0, statements=3, error="Boom"))
+
+    (record,) = caplog.records
+    assert record.message.startswith("Service slow took 1000.0ms, 3 statements")
+    assert record.message.endswith("failed with Boom")
+
+
+def test_span_sink_records_a_span_per_call() -> None:
+    tracer = MagicMock()
+    metrics = ServiceMetrics("service", started_at=1_000, duration=2.5, rows=4)
+
+    SpanSink(tracer).record(metrics)
+
+    name, kwargs = tracer.start_span.call_args
+    assert name == ("service",)
+    assert kwargs["start_time"] == 1_000
+    assert kwargs["attributes"]["db.rows"] == 4
+    tracer.start_span.return_value.end.assert_called_once_with(end_time=2_500_001_000)
+
+
+def test_failing_sink_does_not_fail_the_service(
+    session_maker: sessionmaker[Session],
+) -> None:
+    sink: Any = MagicMock()
+    sink.record.side_effect = RuntimeError("exporter down")
+    register_instrumentation_sink(session_maker, sink)
+    try:
+        assert add_and_list_people("Measured Three") == 1
+    finally:
+        instrumentation._instrumentation_sinks.clear()
+
+    sink.record.assert_called_once()